@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import auth, users, notices, sources, tags, questions
+from app.api.endpoints import auth, users, notices, sources, tags, questions, admin, problem_lists
 
 api_router = APIRouter()
 
@@ -20,3 +20,9 @@ api_router.include_router(tags.router, prefix="/tags", tags=["tags"])
 
 # Question routes
 api_router.include_router(questions.router, prefix="/questions", tags=["questions"])
+
+# Problem list routes
+api_router.include_router(problem_lists.router, prefix="/lists", tags=["problem lists"])
+
+# Admin routes
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -1,16 +1,18 @@
 # app/api/deps
+import asyncio
 import logging
-from typing import Annotated, Optional
+from typing import Annotated, List, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from nanoid.generate import generate
-from redis.asyncio.client import Redis
 
-from app.api.utils import get_redis_client
+from app.api.utils import get_redis_batcher
+from app.core.admission import DeadlineExceeded
 from app.core.config import settings
-from app.core.security import is_token_blacklisted
+from app.core.session_epoch import get_session_epoch
+from app.core.tracing import trace_phase
 from app.models import User
 
 # Redis 中存储 UID 池的键名
@@ -21,49 +23,58 @@ UID_POOL_SIZE = 1000
 UID_POOL_THRESHOLD = 100
 # 最大重试次数
 MAX_RETRIES = 3
+# UID 字符集与长度
+UID_ALPHABET = '0123456789'
+UID_LENGTH = 10
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
+# 允许匿名访问的接口使用，未携带 token 时不报错
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", auto_error=False)
 
 
 async def fill_uid_pool() -> None:
     """填充 UID 池，确保池中始终有足够的 UID"""
-    client: Redis = await get_redis_client()
-    current_size = await client.scard(UID_POOL_KEY) # type:ignore
-    while current_size < UID_POOL_SIZE:
+    batcher = await get_redis_batcher()
+    missing = UID_POOL_SIZE - await batcher.execute("SCARD", UID_POOL_KEY)
+    attempts = 0
+    while missing > 0 and attempts < MAX_RETRIES:
+        attempts += 1
         # 仅使用数字 0 - 9 作为字符集，生成 10 位的短 UID
-        alphabet = '0123456789'
-        uid = generate(alphabet, 10)
-        # 直接使用 get_or_none 检查用户是否存在
-        if not await User.get_or_none(uid=uid): # type:ignore
-            # 将生成的 UID 添加到 Redis 集合中
-            await client.sadd(UID_POOL_KEY, uid) # type:ignore
-            current_size += 1
+        candidates = {generate(UID_ALPHABET, UID_LENGTH) for _ in range(missing)}
+        # 一次查询过滤掉已被占用的 UID，代替逐个 get_or_none
+        taken = set(await User.filter(uid__in=list(candidates)).values_list('uid', flat=True))  # type:ignore
+        fresh = candidates - taken
+        if fresh:
+            # 一条 SADD 批量写入 Redis 集合
+            missing -= await batcher.execute("SADD", UID_POOL_KEY, *fresh)
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
     """获取当前用户信息"""
     try:
-        # 检查 token 是否在黑名单中
-        if await is_token_blacklisted(token):
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        email = payload.get("sub")
+        if not email:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="登录已过期，请重新登录",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email = payload.get("sub")
-        if not email:
+        with trace_phase("auth_user"):
+            user = await User.get_or_none(email=email)
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="登录已过期，请重新登录",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        user = await User.get_or_none(email=email)
-        if not user:
+        # 检查 token 是否签发于最近一次注销之前
+        with trace_phase("auth_epoch"):
+            session_epoch = await get_session_epoch(user.id)
+        if payload.get("epoch", 0) < session_epoch:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="登录已过期，请重新登录",
@@ -79,6 +90,19 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
         )
 
 
+async def get_optional_user(token: Annotated[Optional[str], Depends(optional_oauth2_scheme)]) -> Optional[User]:
+    """获取当前用户信息，未登录或登录已失效时返回 None"""
+    if not token:
+        return None
+    try:
+        return await get_current_user(token)
+    except DeadlineExceeded:
+        # 请求已超时，不能当作匿名用户继续处理
+        raise
+    except HTTPException:
+        return None
+
+
 async def get_current_admin(current_user: Annotated[User, Depends(get_current_user)]) -> User:
     """获取当前管理员用户信息"""
     if not current_user.is_admin:
@@ -91,10 +115,10 @@ async def get_current_admin(current_user: Annotated[User, Depends(get_current_us
 
 async def get_uid_from_pool() -> Optional[str]:
     """从 Redis 池中获取一个 UID"""
-    client: Redis = await get_redis_client()
     try:
+        batcher = await get_redis_batcher()
         # 使用 spop 操作并处理返回值
-        result = await client.spop(UID_POOL_KEY) # type:ignore
+        result = await batcher.execute("SPOP", UID_POOL_KEY)
 
         if result is None:
             # 如果池为空，返回 None
@@ -105,31 +129,56 @@ async def get_uid_from_pool() -> Optional[str]:
         else:
             # 其他情况（理论上不会发生），返回 None
             return None
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"从 Redis 获取 UID 失败: {e}")
         return None
 
 
+async def allocate_uid_block(count: int) -> List[str]:
+    """一次性分配一批唯一 UID：先从池中批量弹出，不足的部分直接生成并用一次查询去重"""
+    uids: List[str] = []
+    try:
+        batcher = await get_redis_batcher()
+        uids.extend(await batcher.execute("SPOP", UID_POOL_KEY, count) or [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"从 Redis 批量获取 UID 失败: {e}")
+
+    while len(uids) < count:
+        candidates = {generate(UID_ALPHABET, UID_LENGTH) for _ in range(count - len(uids))} - set(uids)
+        taken = set(await User.filter(uid__in=list(candidates)).values_list('uid', flat=True))  # type:ignore
+        uids.extend(candidates - taken)
+    return uids[:count]
+
+
 async def generate_unique_uid() -> Optional[str]:
     """生成唯一的用户 UID"""
     retries = 0
     while retries < MAX_RETRIES:
         try:
-            client: Redis = await get_redis_client()
-            # 检查池中的 UID 数量
-            current_size = await client.scard(UID_POOL_KEY) # type:ignore
-            if current_size < UID_POOL_THRESHOLD:
+            batcher = await get_redis_batcher()
+            # SCARD 与 SPOP 互不依赖，同一 tick 内发出，合并为一次往返
+            current_size, uid = await asyncio.gather(
+                batcher.execute("SCARD", UID_POOL_KEY),
+                get_uid_from_pool(),
+            )
+            # 池中 UID 数量低于阈值时补充
+            if current_size - 1 < UID_POOL_THRESHOLD:
                 await fill_uid_pool()
-            
-            # 尝试从池中获取 UID
-            uid = await get_uid_from_pool()
+
             if uid:
                 return uid
 
             # 如果获取失败，重新填充并重试
             await fill_uid_pool()
             retries += 1
-            
+
+        except HTTPException:
+            # 截止时间已过（DeadlineExceeded）等，重试只会继续失败
+            raise
         except Exception as e:
             logger.error(f"生成 UID 时发生错误: {e}")
             retries += 1
@@ -138,10 +187,12 @@ async def generate_unique_uid() -> Optional[str]:
     logger.warning("从 Redis 池获取 UID 失败，直接生成新 UID")
     while True:
         try:
-            uid = generate('0123456789', 10)
+            uid = generate(UID_ALPHABET, UID_LENGTH)
             # 直接使用 get_or_none 检查用户是否存在
             if not await User.get_or_none(uid=uid): # type:ignore
                 return uid
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"生成新 UID 时发生错误: {e}")
             continue
@@ -0,0 +1,61 @@
+# app/api/endpoints/admin
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+
+from app.api.deps import get_current_admin
+from app.api.utils import get_redis_batcher
+from app.core.admission import admission
+from app.core.provisioning import parse_records, provision_users
+from app.core.tracing import slow_requests
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+
+@router.post("/redis/stats")
+async def get_redis_stats():
+    """Redis 命令批处理统计：每次往返携带的命令数"""
+    batcher = await get_redis_batcher()
+    return {
+        "code": status.HTTP_200_OK,
+        "msg": "成功获取Redis统计信息",
+        "data": batcher.stats()
+    }
+
+
+@router.post("/admission")
+async def get_admission_stats():
+    """准入控制统计：各路由组的并发数、排队深度、放行与拒绝次数，以及因超过截止时间被丢弃的请求数"""
+    return {
+        "code": status.HTTP_200_OK,
+        "msg": "成功获取准入控制统计信息",
+        "data": admission.stats()
+    }
+
+
+@router.post("/slow-requests")
+async def get_slow_requests():
+    """最近的慢请求，包含每条 SQL 与 Redis 命令的耗时（需开启 SLOW_REQUEST_SAMPLER_ENABLED）"""
+    return {
+        "code": status.HTTP_200_OK,
+        "msg": "成功获取慢请求记录",
+        "data": list(reversed(slow_requests))
+    }
+
+
+@router.post("/users/bulk")
+async def bulk_provision_users(file: UploadFile = File(...)):
+    """批量创建账号，接受带表头的 CSV（email,password,nick_name,phone）或 JSONL"""
+    filename = (file.filename or "").lower()
+    fmt = "jsonl" if filename.endswith((".jsonl", ".ndjson")) else "csv"
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="文件必须使用 UTF-8 编码"
+        )
+    report = await provision_users(parse_records(content, fmt))
+    return {
+        "code": status.HTTP_200_OK,
+        "msg": "批量创建完成",
+        "data": report
+    }
@@ -1,18 +1,19 @@
 # app/api/endpoints/auth
 import logging
 
-from datetime import timedelta, datetime, timezone
+from datetime import timedelta
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import jwt, JWTError
-from jwt import ExpiredSignatureError
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from app.api.deps import get_current_user, generate_unique_uid
 from app.core.config import settings
-from app.core.security import verify_password, create_access_token, get_password_hash, add_token_to_blacklist
+from app.core.security import (
+    verify_password, create_access_token, get_password_hash, needs_password_rehash, revoke_user_sessions
+)
+from app.core.session_epoch import get_session_epoch
 from app.models import User
 from app.schemas import UserResponse, UserCreate, Token
 
@@ -76,9 +77,15 @@ async def login(request: Request, form_data: Annotated[OAuth2PasswordRequestForm
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        # 批量导入的账号使用较低的哈希成本，首次登录时升级
+        if needs_password_rehash(user.password_hash):
+            await User.filter(id=user.id).update(password_hash=get_password_hash(form_data.password))
+
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.email}, expires_delta=access_token_expires
+            data={"sub": user.email},
+            expires_delta=access_token_expires,
+            session_epoch=await get_session_epoch(user.id, fresh=True),
         )
 
         return Token(access_token=access_token)
@@ -121,49 +128,16 @@ async def get_current_user_info(
         )
 
 
-@router.post("/logout", dependencies=[Depends(get_current_user)])
+@router.post("/logout")
 @limiter.limit(settings.RATE_LIMIT_AUTH)
-async def logout(request: Request):
+async def logout(
+        request: Request,
+        current_user: Annotated[User, Depends(get_current_user)]
+):
     try:
-        # 从Authorization头获取token
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            logger.warning("无效的认证头格式")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="无效的认证头",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        token = auth_header.split(" ")[1]
-
-        try:
-            # 验证token是否有效
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-
-            # 获取token剩余过期时间
-            exp = payload.get("exp")
-            if exp:
-                exp_time = datetime.fromtimestamp(exp, timezone.utc)
-                remaining_time = exp_time - datetime.now(timezone.utc)
-                if remaining_time.total_seconds() > 0:
-                    # 将token加入黑名单
-                    await add_token_to_blacklist(token, remaining_time)
-                    logger.info(f"Token成功加入黑名单，剩余有效期: {remaining_time.total_seconds()}秒")
-
-            return {"message": "已成功注销"}
-
-        except ExpiredSignatureError:
-            logger.warning("Token已过期")
-            return {"message": "Token已过期，无需注销"}
-        except JWTError as e:
-            logger.warning(f"无效的Token: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="无效的token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
+        # 递增会话纪元，该用户此前签发的所有 token 同时失效
+        await revoke_user_sessions(current_user.id)
+        return {"message": "已成功注销"}
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
@@ -1,11 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from typing import List
+from app.core.payload_cache import payload_cache
+from app.core.query_audit import explain_check
 from app.models import Notice
 from app.schemas import NoticeResponse
 
 router = APIRouter()
 
+
+async def _load_notices() -> List[NoticeResponse]:
+    notices_query = Notice.all().order_by('-time')
+    await explain_check(notices_query, "get_notices")
+    return [NoticeResponse.model_validate(notice) for notice in await notices_query]
+
+
 @router.post("", response_model=List[NoticeResponse])
-async def get_notices():
-    notices = await Notice.all().order_by('-time')
-    return notices
+async def get_notices(request: Request):
+    return await payload_cache.respond(request, "notices", _load_notices)
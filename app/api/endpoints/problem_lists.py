@@ -0,0 +1,146 @@
+# app/api/endpoints/problem_lists
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from tortoise.exceptions import IntegrityError
+from tortoise.functions import Count
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.problem_lists import (
+    add_list_member,
+    forget_list,
+    forget_user_lists,
+    get_user_lists,
+    remove_list_member,
+)
+from app.models import ProblemList, Question, User
+from app.schemas import ProblemListCreate, ProblemListItem, ProblemListResponse
+
+router = APIRouter()
+
+FAVORITES_NAME = "我的收藏"
+
+
+async def _get_favorites(user: User) -> ProblemList:
+    """获取用户的收藏夹，不存在时自动创建"""
+    favorites = await ProblemList.get_or_none(favorite_owner=user.id)
+    if favorites is not None:
+        return favorites
+    try:
+        favorites = await ProblemList.create(
+            user_id=user.id, name=FAVORITES_NAME, is_favorite=True, favorite_owner=user.id
+        )
+    except IntegrityError:
+        # 并发请求已创建了收藏夹，favorite_owner 的唯一索引拒绝了这一次插入
+        return await ProblemList.get(favorite_owner=user.id)
+    await forget_user_lists(user.id)
+    return favorites
+
+
+async def _get_own_list(user: User, list_id: int) -> ProblemList:
+    if list_id not in await get_user_lists(user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="题单不存在"
+        )
+    return await ProblemList.get(id=list_id)
+
+
+async def _get_question(question_id: int) -> Question:
+    question = await Question.get_or_none(id=question_id)
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="题目不存在"
+        )
+    return question
+
+
+@router.post("")
+async def get_problem_lists(current_user: Annotated[User, Depends(get_current_user)]):
+    rows = await ProblemList.filter(user_id=current_user.id).annotate(
+        count=Count("questions")
+    ).order_by("-is_favorite", "id").values("id", "name", "is_favorite", "count")
+    return {
+        "code": status.HTTP_200_OK,
+        "msg": "成功获取题单",
+        "data": [ProblemListResponse(**row) for row in rows]
+    }
+
+
+@router.post("/create", status_code=status.HTTP_201_CREATED)
+async def create_problem_list(
+    list_create: ProblemListCreate,
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    if len(await get_user_lists(current_user.id)) >= settings.MAX_PROBLEM_LISTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="题单数量已达上限"
+        )
+    problem_list = await ProblemList.create(user_id=current_user.id, name=list_create.name)
+    await forget_user_lists(current_user.id)
+    return {
+        "code": status.HTTP_201_CREATED,
+        "msg": "题单创建成功",
+        "data": ProblemListResponse(id=problem_list.id, name=problem_list.name, is_favorite=False, count=0)
+    }
+
+
+@router.post("/favorites/add")
+async def add_favorite(item: ProblemListItem, current_user: Annotated[User, Depends(get_current_user)]):
+    question = await _get_question(item.question_id)
+    favorites = await _get_favorites(current_user)
+    await favorites.questions.add(question)
+    await add_list_member(favorites.id, question.id)
+    return {}
+
+
+@router.post("/favorites/remove")
+async def remove_favorite(item: ProblemListItem, current_user: Annotated[User, Depends(get_current_user)]):
+    question = await _get_question(item.question_id)
+    favorites = await _get_favorites(current_user)
+    await favorites.questions.remove(question)
+    await remove_list_member(favorites.id, question.id)
+    return {}
+
+
+@router.post("/{list_id}/delete")
+async def delete_problem_list(list_id: int, current_user: Annotated[User, Depends(get_current_user)]):
+    problem_list = await _get_own_list(current_user, list_id)
+    if problem_list.is_favorite:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="收藏夹不能删除"
+        )
+    await problem_list.delete()
+    await forget_list(list_id)
+    await forget_user_lists(current_user.id)
+    return {}
+
+
+@router.post("/{list_id}/add")
+async def add_to_problem_list(
+    list_id: int,
+    item: ProblemListItem,
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    problem_list = await _get_own_list(current_user, list_id)
+    question = await _get_question(item.question_id)
+    await problem_list.questions.add(question)
+    await add_list_member(list_id, question.id)
+    return {}
+
+
+@router.post("/{list_id}/remove")
+async def remove_from_problem_list(
+    list_id: int,
+    item: ProblemListItem,
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    problem_list = await _get_own_list(current_user, list_id)
+    question = await _get_question(item.question_id)
+    await problem_list.questions.remove(question)
+    await remove_list_member(list_id, question.id)
+    return {}
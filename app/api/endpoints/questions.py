@@ -1,13 +1,37 @@
 import logging
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from app.models import Question
-from app.schemas import QuestionsResponse, QuestionResponse
+from app.api.deps import get_optional_user
+from app.core.catalog import CatalogSnapshot, catalog
+from app.core.config import settings
+from app.core.facets import facet_index
+from app.core.problem_lists import annotate_membership, get_list_question_ids, get_user_lists
+from app.core.query_audit import explain_check
+from app.core.similarity import similarity
+from app.core.tracing import trace_phase
+from app.models import Question, User
+from app.schemas import QuestionsResponse, QuestionResponse, QuestionFacetsResponse
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+
+def _parse_ids(ids: str) -> List[int]:
+    return [int(item) for item in ids.split(",") if item.isdigit()]
+
+
+def _snapshot_question(snapshot: CatalogSnapshot, row: int) -> QuestionResponse:
+    return QuestionResponse(
+        id=snapshot.question_ids[row],
+        title=snapshot.title(row),
+        difficulty=snapshot.difficulty[row],
+        source=snapshot.source_name(snapshot.source_ids[row]),
+        tags=[snapshot.tag_name(tag_id) for tag_id in snapshot.tags_of(row)],
+    )
+
+
 @router.post("")
 async def get_questions(
     page: int = Query(1, ge=1),
@@ -17,6 +41,9 @@ async def get_questions(
     tag_ids: str = "",
     min_difficulty: int = 1,
     max_difficulty: int = 3,
+    favorites_only: bool = False,
+    list_id: int = 0,
+    current_user: Annotated[Optional[User], Depends(get_optional_user)] = None,
 ) -> QuestionsResponse:
     try:
         # Build base query
@@ -39,37 +66,125 @@ async def get_questions(
         
         # Add tags filter if specified
         if tag_ids:
-            tag_id_list = [int(tag_id) for tag_id in tag_ids.split(",") if tag_id.isdigit()]
+            tag_id_list = _parse_ids(tag_ids)
             if tag_id_list:
                 questions_query = questions_query.filter(
                     tags__id__in=tag_id_list
                 )
                 logger.info(f"Added tags filter: tagIds={tag_id_list}")
         
+        # Restrict to one of the user's problem lists if requested
+        if favorites_only or list_id:
+            if current_user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="请先登录",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            user_lists = await get_user_lists(current_user.id)
+            if favorites_only:
+                list_id = next((lid for lid, is_favorite in user_lists.items() if is_favorite), 0)
+            elif list_id not in user_lists:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="题单不存在"
+                )
+            member_ids = await get_list_question_ids(list_id) if list_id else []
+            questions_query = questions_query.filter(id__in=member_ids)
+            logger.info(f"Added problem list filter: listId={list_id}")
+
         # Get total count
-        total = await questions_query.count()
+        with trace_phase("count"):
+            total = await questions_query.count()
         logger.info(f"Total matching questions: {total}")
         
-        # Get paginated results
-        questions = await questions_query.prefetch_related(
-            'source', 'tags'
-        ).offset((page - 1) * size).limit(size).all()
+        # Get paginated results; audit the query as executed, with its LIMIT
+        page_query = questions_query.offset((page - 1) * size).limit(size)
+        await explain_check(page_query, "get_questions")
+        with trace_phase("fetch"):
+            questions = await page_query.prefetch_related('source', 'tags').all()
         
+        # Annotate the whole page with list membership in one batched check
+        membership = {}
+        if current_user is not None:
+            with trace_phase("membership"):
+                membership = await annotate_membership(current_user.id, [q.id for q in questions])
+
         # Format response
-        question_responses = []
-        for q in questions:
-            question_responses.append(QuestionResponse(
-                id=q.id,
-                title=q.title,
-                difficulty=q.difficulty,
-                source=q.source.name,
-                tags=[tag.name for tag in q.tags]
-            ))
-        
-        return QuestionsResponse(
-            questions=question_responses,
-            total=total
-        )
+        with trace_phase("serialize"):
+            question_responses = []
+            for q in questions:
+                starred, list_ids = membership.get(q.id, (False, []))
+                question_responses.append(QuestionResponse(
+                    id=q.id,
+                    title=q.title,
+                    difficulty=q.difficulty,
+                    source=q.source.name,
+                    tags=[tag.name for tag in q.tags],
+                    starred=starred,
+                    list_ids=list_ids
+                ))
+
+            return QuestionsResponse(
+                questions=question_responses,
+                total=total
+            )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_questions: {str(e)}")
         raise
+
+
+@router.post("/facets")
+async def get_question_facets(
+    query: str = "",
+    source_id: int = 0,
+    tag_ids: str = "",
+    min_difficulty: int = 1,
+    max_difficulty: int = 3,
+) -> QuestionFacetsResponse:
+    """Per-difficulty, per-source and per-tag counts for the same filters as get_questions."""
+    await facet_index.ensure_ready()
+
+    # Titles are in the snapshot too, so title search is answered without the database
+    restrict = facet_index.title_mask(query) if query else None
+
+    mask = facet_index.mask(
+        min_difficulty, max_difficulty, source_id, _parse_ids(tag_ids), restrict
+    )
+    return QuestionFacetsResponse(total=mask.bit_count(), **facet_index.counts(mask))
+
+
+@router.post("/random")
+async def pick_random_questions(
+    k: int = Query(1, ge=1, le=settings.MAX_RANDOM_PICKS),
+    source_id: int = 0,
+    tag_ids: str = "",
+    min_difficulty: int = 1,
+    max_difficulty: int = 3,
+    exclude_ids: str = "",
+) -> QuestionsResponse:
+    """Uniformly pick k distinct questions matching the filters, skipping exclude_ids; total is the size of the pool."""
+    snapshot = await facet_index.ensure_ready()
+    rows = facet_index.filtered_rows(min_difficulty, max_difficulty, source_id, _parse_ids(tag_ids))
+    picked, available = facet_index.sample(rows, k, _parse_ids(exclude_ids))
+    return QuestionsResponse(
+        questions=[_snapshot_question(snapshot, row) for row in picked],
+        total=available
+    )
+
+
+@router.post("/{question_id}/similar")
+async def get_similar_questions(question_id: int) -> QuestionsResponse:
+    """Precomputed most similar questions by tag overlap, source and difficulty."""
+    snapshot = await catalog.ensure_ready()
+    if snapshot.row_of(question_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="题目不存在"
+        )
+    table = similarity.get()
+    rows = [snapshot.row_of(neighbour) for neighbour in table.lookup(question_id)] if table is not None else []
+    questions = [_snapshot_question(snapshot, row) for row in rows if row is not None]
+    return QuestionsResponse(questions=questions, total=len(questions))
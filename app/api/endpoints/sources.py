@@ -1,11 +1,21 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from typing import List
-from app.models import Source
+from app.core.catalog import catalog
+from app.core.payload_cache import payload_cache
 from app.schemas import SourceResponse
 
 router = APIRouter()
 
+
+async def _load_sources() -> List[SourceResponse]:
+    snapshot = await catalog.ensure_ready()
+    return [SourceResponse(id=source_id, name=name) for source_id, name in snapshot.sources()]
+
+
+# 快照替换后丢弃旧的响应缓存
+catalog.add_listener(lambda _: payload_cache.invalidate("sources"))
+
+
 @router.post("", response_model=List[SourceResponse])
-async def get_sources():
-    sources = await Source.all()
-    return sources
+async def get_sources(request: Request):
+    return await payload_cache.respond(request, "sources", _load_sources)
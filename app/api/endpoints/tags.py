@@ -1,11 +1,21 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from typing import List
-from app.models import Tag
+from app.core.catalog import catalog
+from app.core.payload_cache import payload_cache
 from app.schemas import TagResponse
 
 router = APIRouter()
 
+
+async def _load_tags() -> List[TagResponse]:
+    snapshot = await catalog.ensure_ready()
+    return [TagResponse(id=tag_id, name=name) for tag_id, name in snapshot.tags()]
+
+
+# 快照替换后丢弃旧的响应缓存
+catalog.add_listener(lambda _: payload_cache.invalidate("tags"))
+
+
 @router.post("", response_model=List[TagResponse])
-async def get_tags():
-    tags = await Tag.all()
-    return tags
+async def get_tags(request: Request):
+    return await payload_cache.respond(request, "tags", _load_tags)
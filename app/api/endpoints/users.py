@@ -1,14 +1,47 @@
-from typing import Annotated
+from typing import Annotated, Any, Dict, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError
 
 from app.api.deps import get_current_user
-from app.core.security import get_password_hash
+from app.core.profile_cache import PUBLIC_FIELDS, profile_cache
+from app.core.security import get_password_hash, revoke_user_sessions
 from app.models import User
-from app.schemas import UserUpdate, UserPasswordUpdate
+from app.schemas import UserUpdate, UserPasswordUpdate, UserProfilesQuery, UserPublicProfile
 
 router = APIRouter()
 
+PUBLIC_FIELDS_SET = frozenset(PUBLIC_FIELDS)
+
+
+async def _get_target_user(id: int, current_user: User) -> User:
+    """Reuse the authenticated instance when users edit themselves."""
+    if current_user.id == id:
+        return current_user
+    return await User.get_or_none(id=id)
+
+
+async def _apply_user_update(user: User, changes: Dict[str, Any]) -> None:
+    """Write only the changed columns in one UPDATE and keep the instance and profile cache in sync."""
+    if not changes:
+        return
+    # queryset update() bypasses auto_now, so stamp modified_at explicitly
+    changes["modified_at"] = timezone.now()
+    await User.filter(id=user.id).update(**changes)
+    for field, value in changes.items():
+        setattr(user, field, value)
+    if PUBLIC_FIELDS_SET.intersection(changes):
+        await profile_cache.invalidate(user.uid)
+
+
+@router.post("/profiles", response_model=List[UserPublicProfile])
+async def get_profiles(profiles_query: UserProfilesQuery):
+    """Public profiles for a batch of UIDs, in request order; unknown UIDs are omitted."""
+    profiles = await profile_cache.get_many(profiles_query.uids)
+    return [profiles[uid] for uid in dict.fromkeys(profiles_query.uids) if uid in profiles]
+
+
 @router.post("/{id}/reset")
 async def reset_info(
     id: int,
@@ -21,31 +54,28 @@ async def reset_info(
             detail="Not enough permissions"
         )
     
-    user = await User.get_or_none(id=id)
+    user = await _get_target_user(id, current_user)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Check if email is already taken by another user
-    if user_update.email and user_update.email != user.email:
-        existing_user = await User.get_or_none(email=user_update.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-    
-    # Update only provided fields
-    if user_update.email:
-        user.email = user_update.email
-    if user_update.nick_name:
-        user.nick_name = user_update.nick_name
-    if user_update.phone:
-        user.phone = user_update.phone
-        
-    await user.save()
+    # Collect only provided fields that actually differ
+    changes: Dict[str, Any] = {}
+    for field in ("email", "nick_name", "phone"):
+        value = getattr(user_update, field)
+        if value and value != getattr(user, field):
+            changes[field] = value
+
+    # Email uniqueness is enforced by the unique index
+    try:
+        await _apply_user_update(user, changes)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     return {}
 
 @router.post("/{id}/pass")
@@ -60,13 +90,14 @@ async def reset_password(
             detail="权限不足"
         )
     
-    user = await User.get_or_none(id=id)
+    user = await _get_target_user(id, current_user)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="未找到用户"
         )
     
-    user.password_hash = get_password_hash(password_update.password)
-    await user.save()
+    await _apply_user_update(user, {"password_hash": get_password_hash(password_update.password)})
+    # Sign out every existing session of this user
+    await revoke_user_sessions(user.id)
     return {}
@@ -8,6 +8,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 from app.core.config import settings
+from app.core.redis_batch import RedisBatcher
 
 
 # 构造日志消息的辅助函数
@@ -30,6 +31,8 @@ def construct_log_message(request: Request, response, body: str) -> str:
 
 # Redis 客户端单例
 _redis_client: Optional[Redis] = None
+# Redis 命令批处理器单例
+_redis_batcher: Optional[RedisBatcher] = None
 
 async def get_redis_client() -> Redis:
     """
@@ -66,12 +69,27 @@ async def get_redis_client() -> Redis:
             raise ConnectionError(f"Redis连接时发生意外错误: {e}")
     return _redis_client
 
+async def get_redis_batcher() -> RedisBatcher:
+    """
+    获取 Redis 命令批处理器实例的异步函数。
+    同一 tick 内的独立命令会被合并为一次 pipeline 往返。
+    """
+    global _redis_batcher
+    if _redis_batcher is None:
+        _redis_batcher = RedisBatcher(
+            await get_redis_client(),
+            max_batch=settings.REDIS_PIPELINE_MAX_BATCH,
+            enabled=settings.REDIS_AUTO_PIPELINE,
+        )
+    return _redis_batcher
+
 async def close_redis_client() -> None:
     """
     关闭 Redis 客户端连接的异步函数。
     确保在应用关闭时正确释放资源。
     """
-    global _redis_client
+    global _redis_client, _redis_batcher
+    _redis_batcher = None
     if _redis_client is not None:
         await _redis_client.aclose()
         _redis_client = None
\ No newline at end of file
@@ -0,0 +1,282 @@
+# app/core/admission
+import asyncio
+import functools
+import heapq
+import itertools
+import json
+import math
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+# 优先级：数值越小越先获得放行
+HIGH, NORMAL, LOW = 0, 1, 2
+
+# (路径前缀, 路由组, 优先级)；API 路径会加上 BASE_PREFIX
+ROUTE_CLASSES: Tuple[Tuple[str, str, int], ...] = (
+    ("/ping", "ping", HIGH),
+    ("{prefix}/auth", "auth", HIGH),
+    ("{prefix}/questions", "questions", LOW),
+    ("{prefix}/lists", "questions", LOW),
+    ("{prefix}/notices", "catalog", LOW),
+    ("{prefix}/sources", "catalog", LOW),
+    ("{prefix}/tags", "catalog", LOW),
+)
+DEFAULT_ROUTE = ("default", NORMAL)
+
+# 客户端可通过该请求头缩短（不能延长）请求的截止时间，单位毫秒；非正数视为未设置
+TIMEOUT_HEADER = b"x-request-timeout"
+
+# (截止时间, 所属准入控制器)
+_deadline: ContextVar[Optional[Tuple[float, "AdmissionController"]]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(HTTPException):
+    """请求已超过截止时间，继续处理只会浪费数据库连接"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务繁忙，请稍后再试",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+
+
+def check_deadline() -> None:
+    """请求已过截止时间时抛出 DeadlineExceeded，在访问数据库等昂贵操作之前调用"""
+    current = _deadline.get()
+    if current is not None and time.monotonic() >= current[0]:
+        current[1].expired += 1
+        raise DeadlineExceeded()
+
+
+class _Gate:
+    """带优先级等待队列的并发上限：释放名额时直接交给优先级最高、最早到达的等待者"""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self.waiting = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # 统计
+        self.admitted = 0
+        self.shed = 0
+        self.max_wait_ms = 0.0
+
+    async def acquire(self, priority: int, timeout: float) -> bool:
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if timeout <= 0:
+            self.shed += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # 超时的同时恰好拿到了名额，归还给下一个等待者
+                self.release()
+            else:
+                self.waiting -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.shed += 1
+            return False
+        self.admitted += 1
+        self.max_wait_ms = max(self.max_wait_ms, (time.monotonic() - started) * 1000)
+        return True
+
+    def release(self) -> None:
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                # 名额直接转交，active 不变
+                self.waiting -= 1
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "max_wait_ms": round(self.max_wait_ms, 3),
+        }
+
+
+class AdmissionController:
+    """
+    准入控制：每个请求先占用所属路由组的名额，再占用全局名额；
+    名额不足时按优先级排队，排队时间超过预算（或请求截止时间）即提前返回 503。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        route_limits: Dict[str, int],
+        queue_budgets: Dict[int, float],
+        request_timeout: float,
+        base_prefix: str = "",
+        route_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.request_timeout = request_timeout
+        # (路径前缀, 截止时间秒数)；较长的前缀优先匹配，0 表示不设截止时间
+        self._route_timeouts = sorted(
+            ((base_prefix + path, timeout) for path, timeout in (route_timeouts or {}).items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self.queue_budgets = queue_budgets
+        self._global = _Gate(max_concurrency)
+        self._routes = {group: _Gate(limit) for group, limit in route_limits.items()}
+        self._classes = [
+            (prefix.format(prefix=base_prefix), group, priority) for prefix, group, priority in ROUTE_CLASSES
+        ]
+        self.expired = 0
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            max_concurrency=settings.admission_max_concurrency(),
+            route_limits=settings.admission_route_limits(),
+            queue_budgets={
+                HIGH: settings.ADMISSION_QUEUE_BUDGET_HIGH_MS / 1000,
+                NORMAL: settings.ADMISSION_QUEUE_BUDGET_MS / 1000,
+                LOW: settings.ADMISSION_QUEUE_BUDGET_LOW_MS / 1000,
+            },
+            request_timeout=settings.ADMISSION_REQUEST_TIMEOUT_MS / 1000,
+            base_prefix=settings.BASE_PREFIX,
+            route_timeouts=settings.admission_route_timeouts(),
+        )
+
+    def classify(self, path: str) -> Tuple[str, int]:
+        for prefix, group, priority in self._classes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return group, priority
+        return DEFAULT_ROUTE
+
+    def timeout_for(self, path: str) -> float:
+        """请求的截止时长（秒）；批量导入等长耗时接口可单独设置，math.inf 表示不设截止时间"""
+        for prefix, timeout in self._route_timeouts:
+            if path == prefix or path.startswith(prefix + "/"):
+                return timeout or math.inf
+        return self.request_timeout
+
+    async def acquire(self, group: str, priority: int, deadline: float) -> bool:
+        budget = min(self.queue_budgets[priority], deadline - time.monotonic())
+        route = self._routes.get(group)
+        if route is not None and not await route.acquire(priority, budget):
+            return False
+        budget = min(self.queue_budgets[priority], deadline - time.monotonic())
+        if not await self._global.acquire(priority, budget):
+            if route is not None:
+                route.release()
+            return False
+        return True
+
+    def release(self, group: str) -> None:
+        self._global.release()
+        route = self._routes.get(group)
+        if route is not None:
+            route.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "global": self._global.stats(),
+            "routes": {group: gate.stats() for group, gate in self._routes.items()},
+            "expired": self.expired,
+        }
+
+
+admission = AdmissionController.from_settings()
+
+
+class AdmissionMiddleware:
+    """为每个请求设置截止时间并按路由组与优先级准入，排队超出预算时直接返回 503"""
+
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission
+
+    def _deadline(self, scope: Scope, now: float) -> float:
+        timeout = self.controller.timeout_for(scope["path"])
+        for name, value in scope.get("headers", []):
+            if name == TIMEOUT_HEADER:
+                try:
+                    requested = int(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    timeout = min(timeout, requested / 1000)
+                break
+        return now + timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group, priority = self.controller.classify(scope["path"])
+        deadline = self._deadline(scope, time.monotonic())
+        if not await self.controller.acquire(group, priority, deadline):
+            await self._reject(send)
+            return
+
+        token = _deadline.set((deadline, self.controller))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
+            self.controller.release(group)
+
+    @staticmethod
+    async def _reject(send: Send) -> None:
+        body = json.dumps({"detail": "服务繁忙，请稍后再试"}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(settings.ADMISSION_RETRY_AFTER).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _guard(method):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        check_deadline()
+        return await method(self, *args, **kwargs)
+
+    wrapper.__guarded__ = True
+    return wrapper
+
+
+def guard_db_client(client: Any) -> None:
+    """在 Tortoise 连接类的执行方法前检查截止时间，已过期的请求不再占用数据库连接"""
+    classes = [type(client)]
+    transaction_class = getattr(client, "_transaction_class", None)
+    if transaction_class is not None:
+        classes.append(transaction_class)
+    for cls in classes:
+        for name in ("execute_query", "execute_query_dict", "execute_insert", "execute_many", "execute_script"):
+            method = getattr(cls, name, None)
+            if method is not None and not getattr(method, "__guarded__", False):
+                setattr(cls, name, _guard(method))
@@ -0,0 +1,456 @@
+# app/core/catalog
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import time
+import uuid
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from tortoise import Tortoise
+from tortoise.functions import Count, Max
+
+from app.api.utils import get_redis_batcher
+from app.core.config import settings
+from app.core.pubsub import pubsub
+from app.models import Question, Source, Tag
+
+logger = logging.getLogger(__name__)
+
+# 题目、标签、来源变更通知频道，消息内容为变更版本号
+CATALOG_CHANGED_CHANNEL = "catalog_changed"
+# 快照发布通知频道，消息格式为 "host:generation"
+CATALOG_PUBLISHED_CHANNEL = "catalog_published"
+# 目录变更版本号，每次变更 INCR，快照记录构建时读取到的版本
+CATALOG_VERSION_KEY = "catalog:version"
+# 最近一次检查时数据库中目录数据的指纹，用于发现未经 notify_catalog_changed 的直接修改
+CATALOG_FINGERPRINT_KEY = "catalog:fingerprint"
+# 构建锁按主机区分：快照文件是本机文件，每台主机各由一个 worker 构建
+CATALOG_LOCK_KEY = f"catalog:snapshot_lock:{socket.gethostname()}"
+
+MAGIC = b"VJCS"
+FORMAT_VERSION = 2
+# magic, 格式版本, generation, 开始构建的时间, 题目数, 来源数, 标签数, 标签关联数, 字符串数, 字符串字节数
+_HEADER = struct.Struct("<4sIqdIIIIII")
+_ALIGN = 8
+
+# 数据段：(名称, array 类型码, 元素个数)；题目按 id 升序排列，行号即题目在快照中的位置
+_SECTIONS: Tuple[Tuple[str, str, Callable[[Dict[str, int]], int]], ...] = (
+    ("question_ids", "i", lambda n: n["questions"]),
+    ("difficulty", "i", lambda n: n["questions"]),
+    ("source_ids", "i", lambda n: n["questions"]),
+    ("title_refs", "I", lambda n: n["questions"]),
+    ("question_tag_offsets", "I", lambda n: n["questions"] + 1),
+    ("question_tags", "i", lambda n: n["postings"]),
+    ("source_table_ids", "i", lambda n: n["sources"]),
+    ("source_name_refs", "I", lambda n: n["sources"]),
+    ("tag_table_ids", "i", lambda n: n["tags"]),
+    ("tag_name_refs", "I", lambda n: n["tags"]),
+    ("tag_posting_offsets", "I", lambda n: n["tags"] + 1),
+    ("tag_postings", "I", lambda n: n["postings"]),
+    ("string_offsets", "I", lambda n: n["strings"] + 1),
+    ("string_blob", "B", lambda n: n["string_bytes"]),
+)
+
+
+def _layout(counts: Dict[str, int]) -> List[Tuple[str, str, int, int]]:
+    """计算各数据段的 (名称, 类型码, 偏移, 元素个数)，每段按 8 字节对齐"""
+    sections = []
+    offset = _HEADER.size
+    for name, typecode, count_of in _SECTIONS:
+        offset = (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+        count = count_of(counts)
+        sections.append((name, typecode, offset, count))
+        offset += count * array(typecode).itemsize
+    return sections
+
+
+class _StringTable:
+    """驻留字符串表：相同字符串只存一份"""
+
+    def __init__(self):
+        self._refs: Dict[str, int] = {}
+        self.offsets = array("I", [0])
+        self.blob = bytearray()
+
+    def intern(self, value: str) -> int:
+        ref = self._refs.get(value)
+        if ref is None:
+            ref = len(self._refs)
+            self._refs[value] = ref
+            self.blob += value.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return ref
+
+
+def encode_snapshot(
+    generation: int,
+    questions: Iterable[Tuple[int, str, int, int, Iterable[int]]],
+    sources: Iterable[Tuple[int, str]],
+    tags: Iterable[Tuple[int, str]],
+    built_at: Optional[float] = None,
+) -> bytes:
+    """
+    把 (id, 标题, 难度, 来源 id, 标签 id 列表) 形式的题目及来源、标签编码为快照。
+    built_at 为开始读取数据库的时间，此前提交的修改都已包含在快照中。
+    """
+    strings = _StringTable()
+    arrays: Dict[str, array] = {name: array(typecode) for name, typecode, _ in _SECTIONS}
+
+    for source_id, name in sorted(sources):
+        arrays["source_table_ids"].append(source_id)
+        arrays["source_name_refs"].append(strings.intern(name))
+    for tag_id, name in sorted(tags):
+        arrays["tag_table_ids"].append(tag_id)
+        arrays["tag_name_refs"].append(strings.intern(name))
+
+    postings: Dict[int, List[int]] = {tag_id: [] for tag_id in arrays["tag_table_ids"]}
+    arrays["question_tag_offsets"].append(0)
+    for row, (question_id, title, difficulty, source_id, tag_ids) in enumerate(sorted(questions)):
+        arrays["question_ids"].append(question_id)
+        arrays["difficulty"].append(difficulty)
+        arrays["source_ids"].append(source_id)
+        arrays["title_refs"].append(strings.intern(title))
+        for tag_id in sorted(set(tag_ids)):
+            arrays["question_tags"].append(tag_id)
+            postings.setdefault(tag_id, []).append(row)
+        arrays["question_tag_offsets"].append(len(arrays["question_tags"]))
+
+    # 倒排表：每个标签对应的题目行号（升序）
+    arrays["tag_posting_offsets"].append(0)
+    for tag_id in arrays["tag_table_ids"]:
+        arrays["tag_postings"].extend(postings[tag_id])
+        arrays["tag_posting_offsets"].append(len(arrays["tag_postings"]))
+    arrays["string_offsets"] = strings.offsets
+    arrays["string_blob"] = array("B", bytes(strings.blob))
+
+    counts = {
+        "questions": len(arrays["question_ids"]),
+        "sources": len(arrays["source_table_ids"]),
+        "tags": len(arrays["tag_table_ids"]),
+        "postings": len(arrays["tag_postings"]),
+        "strings": len(strings.offsets) - 1,
+        "string_bytes": len(strings.blob),
+    }
+    layout = _layout(counts)
+    name, typecode, offset, count = layout[-1]
+    buffer = bytearray(offset + count * array(typecode).itemsize)
+    _HEADER.pack_into(
+        buffer, 0, MAGIC, FORMAT_VERSION, generation, built_at or time.time(),
+        counts["questions"], counts["sources"], counts["tags"], counts["postings"],
+        counts["strings"], counts["string_bytes"],
+    )
+    for name, typecode, offset, count in layout:
+        data = arrays[name].tobytes()
+        buffer[offset:offset + len(data)] = data
+    return bytes(buffer)
+
+
+class CatalogSnapshot:
+    """
+    只读的目录快照。
+    所有数组都是直接指向底层缓冲区（通常是 mmap 的快照文件）的 memoryview，
+    多个 worker 映射同一文件时共享操作系统的页缓存，不复制数据。
+    """
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        if len(view) < _HEADER.size:
+            raise ValueError("快照文件不完整")
+        (magic, version, self.generation, self.built_at, questions, sources, tags,
+         postings, strings, string_bytes) = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("快照文件格式不匹配")
+        counts = {
+            "questions": questions, "sources": sources, "tags": tags,
+            "postings": postings, "strings": strings, "string_bytes": string_bytes,
+        }
+        layout = _layout(counts)
+        for name, typecode, offset, count in layout:
+            end = offset + count * array(typecode).itemsize
+            if end > len(view):
+                raise ValueError("快照文件不完整")
+            setattr(self, name, view[offset:end].cast(typecode))
+        # 保留对缓冲区的引用，快照对象存活期间映射不会被释放
+        self._buffer = buffer
+
+    @classmethod
+    def open(cls, path: str) -> "CatalogSnapshot":
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped)
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    def string(self, ref: int) -> str:
+        return bytes(self.string_blob[self.string_offsets[ref]:self.string_offsets[ref + 1]]).decode("utf-8")
+
+    def row_of(self, question_id: int) -> Optional[int]:
+        row = bisect_left(self.question_ids, question_id)
+        if row < len(self.question_ids) and self.question_ids[row] == question_id:
+            return row
+        return None
+
+    def title(self, row: int) -> str:
+        return self.string(self.title_refs[row])
+
+    def tags_of(self, row: int) -> memoryview:
+        return self.question_tags[self.question_tag_offsets[row]:self.question_tag_offsets[row + 1]]
+
+    def tag_rows(self, tag_id: int) -> memoryview:
+        """标签的倒排表：含该标签的题目行号，升序"""
+        index = bisect_left(self.tag_table_ids, tag_id)
+        if index < len(self.tag_table_ids) and self.tag_table_ids[index] == tag_id:
+            return self.tag_postings[self.tag_posting_offsets[index]:self.tag_posting_offsets[index + 1]]
+        return self.tag_postings[0:0]
+
+    def source_name(self, source_id: int) -> str:
+        index = bisect_left(self.source_table_ids, source_id)
+        if index < len(self.source_table_ids) and self.source_table_ids[index] == source_id:
+            return self.string(self.source_name_refs[index])
+        return ""
+
+    def tag_name(self, tag_id: int) -> str:
+        index = bisect_left(self.tag_table_ids, tag_id)
+        if index < len(self.tag_table_ids) and self.tag_table_ids[index] == tag_id:
+            return self.string(self.tag_name_refs[index])
+        return ""
+
+    def tags(self) -> List[Tuple[int, str]]:
+        return [(tag_id, self.string(ref)) for tag_id, ref in zip(self.tag_table_ids, self.tag_name_refs)]
+
+    def sources(self) -> List[Tuple[int, str]]:
+        return [(source_id, self.string(ref)) for source_id, ref in zip(self.source_table_ids, self.source_name_refs)]
+
+
+def _encode_rows(generation: int, rows: list, sources: list, tags: list, built_at: float) -> bytes:
+    questions: Dict[int, Tuple[int, str, int, int, List[int]]] = {}
+    for question_id, title, difficulty, source_id, tag_id in rows:
+        entry = questions.setdefault(question_id, (question_id, title, difficulty, source_id, []))
+        if tag_id is not None:
+            entry[4].append(tag_id)
+    return encode_snapshot(generation, questions.values(), sources, tags, built_at)
+
+
+async def _load_rows(generation: int) -> bytes:
+    built_at = time.time()
+    rows = await Question.all().values_list("id", "title", "difficulty", "source_id", "tags__id")
+    sources = await Source.all().values_list("id", "name")
+    tags = await Tag.all().values_list("id", "name")
+    # 分组与编码是纯 Python 的 CPU 密集操作，放到线程中执行，避免阻塞事件循环
+    return await asyncio.to_thread(_encode_rows, generation, rows, sources, tags, built_at)
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".catalog-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+async def _fingerprint() -> str:
+    """
+    数据库中目录数据的廉价指纹：题目数量与最近修改时间、题目-标签关联的聚合值、
+    全部标签与来源（数量很少，直接读取）。题目、标签、来源的增删改都会改变指纹。
+    """
+    questions = await Question.all().annotate(count=Count("id"), last=Max("modified_at")).values("count", "last")
+    links = await Tortoise.get_connection("default").execute_query_dict(
+        "SELECT COUNT(*) AS `count`, SUM(`questions_id`) AS `questions`, SUM(`tag_id`) AS `tags`,"
+        " SUM(`questions_id` * `tag_id`) AS `pairs` FROM `question_tags`"
+    )
+    sources = await Source.all().order_by("id").values_list("id", "name")
+    tags = await Tag.all().order_by("id").values_list("id", "name")
+    state = (questions, links, sources, tags)
+    return hashlib.sha1(repr(state).encode("utf-8")).hexdigest()
+
+
+class CatalogStore:
+    """
+    管理当前 worker 使用的目录快照。
+    每台主机上由抢到 Redis 锁的一个 worker 从数据库构建快照，写入临时文件后
+    os.replace 原子替换并广播；其余 worker 收到通知后重新映射文件并替换引用。
+    读取方先取得 catalog.snapshot 的局部引用再使用，替换过程中不会读到一半新一半旧的数据。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._listeners: List[Callable[[CatalogSnapshot], None]] = []
+        # 最近一次收到变更通知的时间，早于该时间开始构建的快照需要重建
+        self._requested_at = 0.0
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._ready_lock = asyncio.Lock()
+
+    def add_listener(self, listener: Callable[[CatalogSnapshot], None]) -> None:
+        """注册快照替换后的回调（如清除由快照派生的缓存）"""
+        self._listeners.append(listener)
+
+    def _swap(self, snapshot: CatalogSnapshot) -> None:
+        # 按构建时间而非 generation 比较：Redis 计数器被重置后 generation 会变小，
+        # 但本机快照文件总是由最近一次构建原子替换的，构建时间单调递增
+        current = self.snapshot
+        if current is not None and snapshot.built_at < current.built_at:
+            return
+        self.snapshot = snapshot
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"目录快照替换回调执行失败: {e}")
+
+    def load(self) -> bool:
+        """映射本机快照文件，文件不存在或损坏时返回 False"""
+        try:
+            snapshot = CatalogSnapshot.open(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"无法读取目录快照 {self.path}: {e}")
+            return False
+        self._swap(snapshot)
+        return True
+
+    async def build(self) -> bool:
+        """在持有本机构建锁时从数据库构建并发布快照；锁被其他 worker 持有时返回 False"""
+        batcher = await get_redis_batcher()
+        token = uuid.uuid4().hex
+        acquired = await batcher.execute(
+            "SET", CATALOG_LOCK_KEY, token, "NX", "EX", settings.CATALOG_SNAPSHOT_LOCK_TTL
+        )
+        if not acquired:
+            return False
+        try:
+            # 先读版本号再查询数据库，构建期间发生的变更会触发下一次构建
+            generation = int(await batcher.execute("GET", CATALOG_VERSION_KEY) or 0)
+            # 同理先记录指纹，构建期间的变更会在下一次定期检查时被发现
+            await batcher.execute("SET", CATALOG_FINGERPRINT_KEY, await _fingerprint())
+            data = await _load_rows(generation)
+            await asyncio.to_thread(_write_atomically, self.path, data)
+        finally:
+            if await batcher.execute("GET", CATALOG_LOCK_KEY) == token:
+                await batcher.execute("DEL", CATALOG_LOCK_KEY)
+        self.load()
+        logger.info(f"目录快照已发布: generation={generation}，{len(data)} 字节")
+        await pubsub.publish(CATALOG_PUBLISHED_CHANNEL, f"{socket.gethostname()}:{generation}")
+        return True
+
+    async def ensure_ready(self) -> CatalogSnapshot:
+        """返回当前快照；本进程尚未加载时依次尝试映射文件、构建、等待其他 worker 构建"""
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot
+        async with self._ready_lock:
+            if self.snapshot is None and not self.load():
+                try:
+                    built = await self.build()
+                except Exception as e:
+                    logger.error(f"构建目录快照失败: {e}")
+                    built = False
+                deadline = time.monotonic() + settings.CATALOG_SNAPSHOT_WAIT
+                while not built and not self.load() and time.monotonic() < deadline:
+                    await asyncio.sleep(0.1)
+                if self.snapshot is None:
+                    # Redis 不可用或等待超时：仅在本进程内存中构建
+                    logger.warning("未能获取共享目录快照，改为在本进程内构建")
+                    self._swap(CatalogSnapshot(await _load_rows(0)))
+        return self.snapshot
+
+    def request_rebuild(self) -> None:
+        """收到变更通知后合并短时间内的多次变更，再构建快照"""
+        self._requested_at = time.time()
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._rebuild_when_stale())
+
+    async def _rebuild_when_stale(self) -> None:
+        while True:
+            await asyncio.sleep(settings.CATALOG_SNAPSHOT_DEBOUNCE)
+            snapshot = self.snapshot
+            if snapshot is not None and snapshot.built_at >= self._requested_at:
+                return
+            try:
+                if await self.build():
+                    return
+            except Exception as e:
+                logger.error(f"构建目录快照失败: {e}")
+            # 其他 worker 正在构建，下一轮检查其结果是否已包含本次变更
+
+    async def refresh_if_changed(self) -> bool:
+        """
+        比较数据库当前的指纹与最近一次构建（或检查）记录的指纹，不一致时通知所有主机重建。
+        GETSET 保证同一次变更只有最先发现的 worker 发出通知。
+        """
+        fingerprint = await _fingerprint()
+        batcher = await get_redis_batcher()
+        previous = await batcher.execute("GETSET", CATALOG_FINGERPRINT_KEY, fingerprint)
+        if previous == fingerprint:
+            return False
+        logger.info("检测到目录数据变更，重建目录快照")
+        await notify_catalog_changed()
+        return True
+
+    async def _refresh_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_if_changed()
+            except Exception as e:
+                logger.error(f"检查目录数据变更失败: {e}")
+
+    def start_refresh(self) -> None:
+        """启动定期检查：题目、标签、来源可能由后台或脚本直接写入数据库，不会调用 notify_catalog_changed"""
+        if self._refresh_task is None and settings.CATALOG_SNAPSHOT_REFRESH > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_periodically(settings.CATALOG_SNAPSHOT_REFRESH))
+
+    async def stop_refresh(self) -> None:
+        for task in (self._refresh_task, self._rebuild_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._refresh_task = None
+        self._rebuild_task = None
+
+
+catalog = CatalogStore(settings.CATALOG_SNAPSHOT_PATH)
+
+
+async def notify_catalog_changed() -> None:
+    """题目（含标签）、标签或来源新增、修改、删除后调用，所有主机的快照都会重建"""
+    batcher = await get_redis_batcher()
+    generation = await batcher.execute("INCR", CATALOG_VERSION_KEY)
+    await pubsub.publish(CATALOG_CHANGED_CHANNEL, str(generation))
+
+
+def _on_changed(data: str) -> None:
+    catalog.request_rebuild()
+
+
+def _on_published(data: str) -> None:
+    host, _ = data.rsplit(":", 1)
+    if host == socket.gethostname():
+        catalog.load()
+
+
+async def _on_connect() -> None:
+    # （重新）订阅时可能错过了变更通知，也可能是新部署后沿用了旧快照文件：
+    # 在后台任务中重建一次，构建失败只记录日志并重试，不影响订阅本身
+    catalog.request_rebuild()
+
+
+pubsub.subscribe(CATALOG_CHANGED_CHANNEL, _on_changed)
+pubsub.subscribe(CATALOG_PUBLISHED_CHANNEL, _on_published, on_connect=_on_connect)
@@ -0,0 +1,183 @@
+# app/core/compression
+import gzip
+import logging
+from typing import Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_LEVEL)
+
+
+def _zstd(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compress(data)
+
+
+# 服务端偏好顺序：压缩率高的在前，仅包含当前环境可用的编码
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None:
+    ENCODERS["br"] = _brotli
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd
+ENCODERS["gzip"] = _gzip
+
+# 值得压缩的内容类型
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# 需要逐块实时送达、不能缓冲的内容类型
+STREAMING_TYPES = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str, available: Optional[List[str]] = None) -> Optional[str]:
+    """根据 Accept-Encoding 选出双方都支持的编码，不需要压缩时返回 None"""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for encoding in available if available is not None else ENCODERS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return ENCODERS[encoding](data)
+
+
+class PrecompressedPayload:
+    """
+    在缓存填充时一次性生成各编码版本的响应体，
+    命中缓存的请求只需按 Accept-Encoding 选择版本，不再消耗压缩 CPU。
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.variants: Dict[str, bytes] = {}
+        if settings.COMPRESSION_ENABLED and len(body) >= settings.COMPRESSION_MIN_SIZE:
+            for encoding in ENCODERS:
+                compressed = compress(body, encoding)
+                if len(compressed) < len(body):
+                    self.variants[encoding] = compressed
+
+    def response(self, accept_encoding: str) -> Response:
+        encoding = negotiate(accept_encoding, list(self.variants))
+        if encoding is None:
+            headers = {"Vary": "Accept-Encoding"} if self.variants else None
+            return Response(self.body, media_type=self.media_type, headers=headers)
+        return Response(
+            self.variants[encoding],
+            media_type=self.media_type,
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+
+
+class CompressionMiddleware:
+    """
+    按 Accept-Encoding 协商 br / zstd / gzip 压缩。
+    分块发送的响应（如经过 BaseHTTPMiddleware 重新转发的 JSON）先缓冲，
+    总大小不超过 maximum_buffer 时合并后整体压缩，超出时原样透传；
+    只压缩超过阈值且内容类型可压缩的响应，已设置 Content-Encoding 的响应（如预压缩的缓存）原样透传。
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, maximum_buffer: int = 1048576):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.maximum_buffer = maximum_buffer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        chunks: List[bytes] = []
+        buffered = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, buffered
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith(STREAMING_TYPES)
+                ):
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                chunks.append(body)
+                buffered += len(body)
+                if buffered <= self.maximum_buffer:
+                    return
+                # 超出缓冲上限：已缓冲的部分与后续分块都原样发送
+                pending_start, start_message = start_message, None
+                await send(pending_start)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                chunks.clear()
+                return
+
+            pending_start, start_message = start_message, None
+            if chunks:
+                chunks.append(body)
+                body = b"".join(chunks)
+                chunks.clear()
+                message = {"type": "http.response.body", "body": body}
+            headers = MutableHeaders(raw=pending_start.setdefault("headers", []))
+            if len(body) < self.minimum_size:
+                await send(pending_start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) < len(body):
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                message["body"] = compressed
+            await send(pending_start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,5 +1,7 @@
 # app/core/config
 import os
+import tempfile
+from typing import Dict
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
@@ -22,12 +24,15 @@ class Settings(BaseSettings):
     DB_TEST_NAME: str = os.getenv("DB_TEST_NAME", "vjudge_test")
     DB_URL : str = f"mysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     TEST_DB_URL: str = f"mysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_TEST_NAME}"
+    DB_POOL_BUDGET: int = int(os.getenv("DB_POOL_BUDGET", "10"))  # 所有 worker 共享的数据库连接总预算
     
     # Redis
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
     REDIS_URL: str = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+    REDIS_AUTO_PIPELINE: bool = os.getenv("REDIS_AUTO_PIPELINE", "True").lower() == "true"  # 同一 tick 内的命令自动合并为 pipeline
+    REDIS_PIPELINE_MAX_BATCH: int = int(os.getenv("REDIS_PIPELINE_MAX_BATCH", "128"))  # 单次 pipeline 最多携带的命令数
     
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your_secret_key")
@@ -38,12 +43,103 @@ class Settings(BaseSettings):
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
+    WORKERS: int = int(os.getenv("WORKERS", "0"))  # 0 表示取 CPU 核数
+    PRELOAD_APP: bool = os.getenv("PRELOAD_APP", "False").lower() == "true"  # fork 前预加载应用；开启后 SIGHUP 不会加载新代码
+    GRACEFUL_TIMEOUT: int = int(os.getenv("GRACEFUL_TIMEOUT", "30"))  # 关闭时等待进行中请求的秒数
+    KEEPALIVE_TIMEOUT: int = int(os.getenv("KEEPALIVE_TIMEOUT", "5"))
+    MAX_REQUESTS: int = int(os.getenv("MAX_REQUESTS", "10000"))  # worker 处理多少请求后自动重启
+
+    # Profile cache
+    PROFILE_CACHE_SIZE: int = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))  # 进程内 LRU 容量
+    PROFILE_CACHE_LOCAL_TTL: int = int(os.getenv("PROFILE_CACHE_LOCAL_TTL", "30"))  # 进程内缓存有效期（秒）
+    PROFILE_CACHE_TTL: int = int(os.getenv("PROFILE_CACHE_TTL", "3600"))  # Redis 缓存有效期（秒）
+    PROFILE_CACHE_NEGATIVE_TTL: int = int(os.getenv("PROFILE_CACHE_NEGATIVE_TTL", "300"))  # 不存在 UID 的缓存有效期（秒）
+
+    # Compression
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))  # 小于该字节数的响应不压缩
+    COMPRESSION_MAX_BUFFER: int = int(os.getenv("COMPRESSION_MAX_BUFFER", "1048576"))  # 分块发送的响应最多缓冲该字节数后整体压缩，超出时不压缩
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))  # 1-9
+    COMPRESSION_BROTLI_LEVEL: int = int(os.getenv("COMPRESSION_BROTLI_LEVEL", "5"))  # 0-11
+    COMPRESSION_ZSTD_LEVEL: int = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))  # 1-22
+    PAYLOAD_CACHE_TTL: int = int(os.getenv("PAYLOAD_CACHE_TTL", "60"))  # 标签、来源、公告列表的缓存有效期（秒）
+
+    # Problem lists
+    PROBLEM_LIST_CACHE_TTL: int = int(os.getenv("PROBLEM_LIST_CACHE_TTL", "86400"))  # 题单成员缓存有效期（秒）
+    MAX_PROBLEM_LISTS: int = int(os.getenv("MAX_PROBLEM_LISTS", "50"))  # 每个用户最多创建的题单数
+
+    # Bulk provisioning
+    PROVISION_BATCH_SIZE: int = int(os.getenv("PROVISION_BATCH_SIZE", "1000"))  # 每个事务插入的行数
+    PROVISION_HASH_WORKERS: int = int(os.getenv("PROVISION_HASH_WORKERS", "0"))  # 密码哈希进程数，0 表示取 CPU 核数
+    PROVISION_BCRYPT_ROUNDS: int = int(os.getenv("PROVISION_BCRYPT_ROUNDS", "0"))  # 批量导入的哈希成本，0 表示与注册相同的默认成本
+
+    # Catalog snapshot
+    CATALOG_SNAPSHOT_PATH: str = os.getenv("CATALOG_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "vjudge-catalog.snapshot"))
+    CATALOG_SNAPSHOT_DEBOUNCE: float = float(os.getenv("CATALOG_SNAPSHOT_DEBOUNCE", "1"))  # 合并该时间窗口内的目录变更后再重建（秒）
+    CATALOG_SNAPSHOT_LOCK_TTL: int = int(os.getenv("CATALOG_SNAPSHOT_LOCK_TTL", "60"))  # 构建锁过期时间（秒）
+    CATALOG_SNAPSHOT_WAIT: float = float(os.getenv("CATALOG_SNAPSHOT_WAIT", "10"))  # 等待其他 worker 构建的最长时间（秒）
+    CATALOG_SNAPSHOT_REFRESH: float = float(os.getenv("CATALOG_SNAPSHOT_REFRESH", "60"))  # 检查数据库中目录数据是否变更的间隔（秒），0 表示不检查
+    RANDOM_PICK_CACHE_SIZE: int = int(os.getenv("RANDOM_PICK_CACHE_SIZE", "256"))  # 随机选题缓存的筛选条件个数
+    MAX_RANDOM_PICKS: int = int(os.getenv("MAX_RANDOM_PICKS", "20"))  # 单次随机选题的最大数量
+
+    # Similar questions
+    SIMILARITY_ENABLED: bool = os.getenv("SIMILARITY_ENABLED", "True").lower() == "true"  # 需要安装 numpy 与 scipy
+    SIMILARITY_PATH: str = os.getenv("SIMILARITY_PATH", os.path.join(tempfile.gettempdir(), "vjudge-similarity.bin"))
+    SIMILAR_TOP_K: int = int(os.getenv("SIMILAR_TOP_K", "10"))  # 每道题保存的相似题目数
+    SIMILARITY_BLOCK_SIZE: int = int(os.getenv("SIMILARITY_BLOCK_SIZE", "256"))  # 每块计算的题目数，内存占用约为 块大小 x 题目数 x 4 字节
+    SIMILARITY_INCREMENTAL_LIMIT: float = float(os.getenv("SIMILARITY_INCREMENTAL_LIMIT", "0.05"))  # 变化题目超过该比例时改为全量重建
+    SIMILARITY_LOCK_TTL: int = int(os.getenv("SIMILARITY_LOCK_TTL", "600"))  # 构建锁过期时间（秒）
+    SIMILARITY_TAG_WEIGHT: float = float(os.getenv("SIMILARITY_TAG_WEIGHT", "0.7"))  # 标签 Jaccard 相似度权重
+    SIMILARITY_SOURCE_WEIGHT: float = float(os.getenv("SIMILARITY_SOURCE_WEIGHT", "0.15"))  # 同来源权重
+    SIMILARITY_DIFFICULTY_WEIGHT: float = float(os.getenv("SIMILARITY_DIFFICULTY_WEIGHT", "0.15"))  # 难度接近程度权重
+
+    # Admission control
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    ADMISSION_MAX_CONCURRENCY: int = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "0"))  # 每个 worker 同时处理的请求数，0 表示数据库连接池大小的 4 倍
+    ADMISSION_ROUTE_LIMITS: str = os.getenv("ADMISSION_ROUTE_LIMITS", "questions=0")  # 路由组并发上限，0 表示数据库连接池大小
+    ADMISSION_QUEUE_BUDGET_HIGH_MS: int = int(os.getenv("ADMISSION_QUEUE_BUDGET_HIGH_MS", "2000"))  # 登录等高优先级请求的最长排队时间
+    ADMISSION_QUEUE_BUDGET_MS: int = int(os.getenv("ADMISSION_QUEUE_BUDGET_MS", "1000"))
+    ADMISSION_QUEUE_BUDGET_LOW_MS: int = int(os.getenv("ADMISSION_QUEUE_BUDGET_LOW_MS", "500"))  # 列表类低优先级请求的最长排队时间
+    ADMISSION_REQUEST_TIMEOUT_MS: int = int(os.getenv("ADMISSION_REQUEST_TIMEOUT_MS", "10000"))  # 请求截止时间，过期后不再访问数据库
+    ADMISSION_ROUTE_TIMEOUTS_MS: str = os.getenv("ADMISSION_ROUTE_TIMEOUTS_MS", "/admin/users/bulk=0")  # 按路径前缀单独设置截止时间，0 表示不设截止时间
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))  # 503 响应的 Retry-After（秒）
+
+    # 请求追踪
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "False").lower() == "true"  # 在响应头中输出各阶段耗时
+    SLOW_REQUEST_SAMPLER_ENABLED: bool = os.getenv("SLOW_REQUEST_SAMPLER_ENABLED", "False").lower() == "true"
+    SLOW_REQUEST_MS: float = float(os.getenv("SLOW_REQUEST_MS", "500"))  # 超过该耗时的请求记录完整的 SQL / Redis 明细
+    SLOW_REQUEST_BUFFER_SIZE: int = int(os.getenv("SLOW_REQUEST_BUFFER_SIZE", "200"))  # 内存中保留的慢请求条数
 
     # Rate Limiting
     RATE_LIMIT_GENERAL: str = os.getenv("RATE_LIMIT_GENERAL", "100/minute")  # 普通接口限制
     RATE_LIMIT_AUTH: str = os.getenv("RATE_LIMIT_AUTH", "20/minute")  # 认证接口限制
     RATE_LIMIT_STRICT: str = os.getenv("RATE_LIMIT_STRICT", "3/minute")  # 严格限制的接口
 
+    def db_pool_size_per_worker(self) -> int:
+        """按 worker 数量均分数据库连接预算"""
+        return max(1, self.DB_POOL_BUDGET // max(1, self.WORKERS))
+
+    def admission_max_concurrency(self) -> int:
+        return self.ADMISSION_MAX_CONCURRENCY or 4 * self.db_pool_size_per_worker()
+
+    def admission_route_limits(self) -> Dict[str, int]:
+        """解析 ADMISSION_ROUTE_LIMITS（如 "questions=8,catalog=16"）"""
+        limits = {}
+        for item in self.ADMISSION_ROUTE_LIMITS.split(","):
+            group, _, limit = item.partition("=")
+            if group.strip() and limit.strip().isdigit():
+                limits[group.strip()] = int(limit) or self.db_pool_size_per_worker()
+        return limits
+
+    def admission_route_timeouts(self) -> Dict[str, float]:
+        """解析 ADMISSION_ROUTE_TIMEOUTS_MS（如 "/admin/users/bulk=0,/admin/reports=60000"），返回秒数，0 表示不设截止时间"""
+        timeouts = {}
+        for item in self.ADMISSION_ROUTE_TIMEOUTS_MS.split(","):
+            path, _, timeout = item.partition("=")
+            if path.strip() and timeout.strip().isdigit():
+                timeouts[path.strip()] = int(timeout) / 1000
+        return timeouts
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,196 @@
+# app/core/facets
+import logging
+import random
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.catalog import CatalogSnapshot, catalog
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _bitmaps(rows_by_value: Dict[int, Iterable[int]], size: int) -> Dict[int, int]:
+    """把每个取值对应的行号集合转换为位图；先写 bytearray 再整体转换，避免逐位构造大整数"""
+    nbytes = (size + 7) // 8
+    bitmaps = {}
+    for value, rows in rows_by_value.items():
+        buffer = bytearray(nbytes)
+        for row in rows:
+            buffer[row >> 3] |= 1 << (row & 7)
+        bits = int.from_bytes(buffer, "little")
+        if bits:
+            bitmaps[value] = bits
+    return bitmaps
+
+
+def _rows_of(mask: int) -> array:
+    """位图中置位的行号，升序"""
+    rows = array("I")
+    for index, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = index << 3
+            for bit in range(8):
+                if byte >> bit & 1:
+                    rows.append(base + bit)
+    return rows
+
+
+def _contains(rows: array, row: int) -> bool:
+    index = bisect_left(rows, row)
+    return index < len(rows) and rows[index] == row
+
+
+class QuestionFacetIndex:
+    """
+    题目筛选维度的内存索引。
+    每道题目对应目录快照中的一行（slot），难度、来源、标签的每个取值各对应一个
+    以 Python 大整数表示的位图；任意筛选组合的结果集与各维度计数
+    都只需要位运算和 popcount，不必对数据库执行 GROUP BY。
+    位图由共享的目录快照派生，快照替换后在下一次访问时重建。
+    """
+
+    def __init__(self):
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._all = 0
+        self._by_difficulty: Dict[int, int] = {}
+        self._by_source: Dict[int, int] = {}
+        self._by_tag: Dict[int, int] = {}
+        # 筛选条件 -> 结果行号数组，供随机选题使用
+        self._row_cache: "OrderedDict[tuple, array]" = OrderedDict()
+        # 按行号排列的小写标题，首次按标题搜索时生成
+        self._titles: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.snapshot) if self.snapshot is not None else 0
+
+    def load(self, snapshot: CatalogSnapshot) -> None:
+        """从快照构建位图"""
+        size = len(snapshot)
+        by_difficulty: Dict[int, list] = {}
+        by_source: Dict[int, list] = {}
+        for row, (difficulty, source_id) in enumerate(zip(snapshot.difficulty, snapshot.source_ids)):
+            by_difficulty.setdefault(difficulty, []).append(row)
+            by_source.setdefault(source_id, []).append(row)
+        self._by_difficulty = _bitmaps(by_difficulty, size)
+        self._by_source = _bitmaps(by_source, size)
+        self._by_tag = _bitmaps({tag_id: snapshot.tag_rows(tag_id) for tag_id in snapshot.tag_table_ids}, size)
+        self._all = (1 << size) - 1
+        self._row_cache.clear()
+        self._titles = None
+        self.snapshot = snapshot
+        logger.info(f"题目筛选索引已重建，共 {size} 道题目（快照 generation={snapshot.generation}）")
+
+    async def ensure_ready(self) -> CatalogSnapshot:
+        snapshot = await catalog.ensure_ready()
+        if self.snapshot is not snapshot:
+            self.load(snapshot)
+        return snapshot
+
+    def ids_to_mask(self, question_ids: Iterable[int]) -> int:
+        mask = 0
+        for question_id in question_ids:
+            slot = self.snapshot.row_of(question_id)
+            if slot is not None:
+                mask |= 1 << slot
+        return mask
+
+    def title_mask(self, query: str) -> int:
+        """标题包含 query（不区分大小写，与 icontains 一致）的题目位图，直接匹配快照中的标题，不访问数据库"""
+        if self._titles is None:
+            self._titles = [self.snapshot.title(row).casefold() for row in range(len(self.snapshot))]
+        needle = query.casefold()
+        rows = [row for row, title in enumerate(self._titles) if needle in title]
+        return _bitmaps({0: rows}, len(self._titles)).get(0, 0)
+
+    def mask(
+        self,
+        min_difficulty: int,
+        max_difficulty: int,
+        source_id: int = 0,
+        tag_ids: Sequence[int] = (),
+        restrict: Optional[int] = None,
+    ) -> int:
+        """与 get_questions 相同语义的筛选结果位图：标签之间为“任一命中”"""
+        difficulty_bits = 0
+        for difficulty, bits in self._by_difficulty.items():
+            if min_difficulty <= difficulty <= max_difficulty:
+                difficulty_bits |= bits
+        mask = self._all & difficulty_bits
+        if source_id > 0:
+            mask &= self._by_source.get(source_id, 0)
+        if tag_ids:
+            tag_bits = 0
+            for tag_id in tag_ids:
+                tag_bits |= self._by_tag.get(tag_id, 0)
+            mask &= tag_bits
+        if restrict is not None:
+            mask &= restrict
+        return mask
+
+    def filtered_rows(
+        self,
+        min_difficulty: int,
+        max_difficulty: int,
+        source_id: int = 0,
+        tag_ids: Sequence[int] = (),
+    ) -> array:
+        """筛选结果的行号数组（升序），按筛选条件做 LRU 缓存，快照替换时清空"""
+        key = (min_difficulty, max_difficulty, source_id, tuple(sorted(set(tag_ids))))
+        rows = self._row_cache.get(key)
+        if rows is None:
+            rows = _rows_of(self.mask(min_difficulty, max_difficulty, source_id, key[3]))
+            self._row_cache[key] = rows
+            if len(self._row_cache) > settings.RANDOM_PICK_CACHE_SIZE:
+                self._row_cache.popitem(last=False)
+        else:
+            self._row_cache.move_to_end(key)
+        return rows
+
+    def sample(self, rows: array, k: int, exclude_ids: Iterable[int] = ()) -> Tuple[List[int], int]:
+        """
+        从行号数组中均匀抽取 k 个互不相同、且不在排除集合中的行，返回 (行号, 可选题目数)。
+        可选行占多数时用拒绝采样，期望 O(k)；排除项过多时退化为过滤后 random.sample。
+        """
+        excluded = set()
+        for question_id in exclude_ids:
+            row = self.snapshot.row_of(question_id)
+            if row is not None and _contains(rows, row):
+                excluded.add(row)
+        available = len(rows) - len(excluded)
+        k = min(k, available)
+        if k <= 0:
+            return [], available
+        if 2 * (available - k) >= len(rows):
+            # 每次抽取的成功概率不低于 1/2
+            picked: List[int] = []
+            seen = set(excluded)
+            while len(picked) < k:
+                row = rows[random.randrange(len(rows))]
+                if row not in seen:
+                    seen.add(row)
+                    picked.append(row)
+            return picked, available
+        return random.sample([row for row in rows if row not in excluded], k), available
+
+    def counts(self, mask: int) -> Dict[str, Dict[int, int]]:
+        """在同一个结果位图上计算所有维度各取值的题目数，只返回非零项"""
+
+        def facet(index: Dict[int, int]) -> Dict[int, int]:
+            result = {}
+            for value, bits in index.items():
+                count = (mask & bits).bit_count()
+                if count:
+                    result[value] = count
+            return result
+
+        return {
+            "difficulty": facet(self._by_difficulty),
+            "sources": facet(self._by_source),
+            "tags": facet(self._by_tag),
+        }
+
+
+facet_index = QuestionFacetIndex()
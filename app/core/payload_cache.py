@@ -0,0 +1,57 @@
+# app/core/payload_cache
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.compression import PrecompressedPayload
+from app.core.config import settings
+
+
+class PayloadCache:
+    """
+    标签、来源、公告等目录类接口的响应缓存。
+    缓存内容是序列化并预压缩后的响应体，填充时只压缩一次。
+    """
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._entries: Dict[str, Tuple[float, PrecompressedPayload]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _lookup(self, key: str) -> Optional[PrecompressedPayload]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> PrecompressedPayload:
+        payload = self._lookup(key)
+        if payload is not None:
+            return payload
+        # 同一个键只允许一个协程回源，其余协程等待结果
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            payload = self._lookup(key)
+            if payload is None:
+                data = jsonable_encoder(await loader())
+                body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                payload = PrecompressedPayload(body)
+                self._entries[key] = (time.monotonic() + self._ttl, payload)
+            return payload
+
+    async def respond(self, request: Request, key: str, loader: Callable[[], Awaitable[Any]]) -> Response:
+        payload = await self.get(key, loader)
+        return payload.response(request.headers.get("accept-encoding", ""))
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+payload_cache = PayloadCache(ttl=settings.PAYLOAD_CACHE_TTL)
@@ -0,0 +1,198 @@
+# app/core/problem_lists
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Sequence, Set, Tuple, TypeVar
+
+from redis.exceptions import WatchError
+
+from app.api.utils import get_redis_batcher, get_redis_client
+from app.core.config import settings
+from app.models import ProblemList, Question
+
+logger = logging.getLogger(__name__)
+
+# Redis 集合：题单中的题目 id，另含哨兵成员 "0" 表示集合已从数据库加载
+LIST_KEY_PREFIX = "problem_list:"
+LIST_SENTINEL = "0"
+# Redis 哈希：用户的题单 id -> 是否为收藏夹，另含哨兵字段 "_"
+USER_LISTS_KEY_PREFIX = "user_problem_lists:"
+USER_LISTS_SENTINEL = "_"
+# 每次写入缓存键时一并 SET 的标记键，回填时与缓存键一起 WATCH。
+# 缓存键不存在时 SREM/DEL 不算修改，WATCH 察觉不到，只能靠标记键
+STAMP_SUFFIX = ":stamp"
+STAMP_TTL = 60
+
+T = TypeVar("T")
+
+
+def _list_key(list_id: int) -> str:
+    return f"{LIST_KEY_PREFIX}{list_id}"
+
+
+def _user_lists_key(user_id: int) -> str:
+    return f"{USER_LISTS_KEY_PREFIX}{user_id}"
+
+
+async def _refill(key: str, read: Callable[[], Awaitable[T]], command: Callable[[T], tuple]) -> T:
+    """
+    从数据库读取并回填缓存键。读库之前先 WATCH 该键及其标记键：读库期间若有写入，
+    EXEC 失败、放弃回填，避免把旧数据写回缓存并保留整个 TTL。Redis 出错时只返回读库结果。
+    """
+    try:
+        redis = await get_redis_client()
+        pipe = redis.pipeline(transaction=True)
+        await pipe.watch(key, key + STAMP_SUFFIX)
+    except Exception as e:
+        logger.error(f"回填题单缓存失败: {e}")
+        return await read()
+    try:
+        result = await read()
+        pipe.multi()
+        pipe.execute_command(*command(result))
+        pipe.expire(key, settings.PROBLEM_LIST_CACHE_TTL)
+        try:
+            await pipe.execute()
+        except WatchError:
+            # 读库期间缓存被修改：本次结果照常返回，缓存留给下次读取重新加载
+            pass
+        except Exception as e:
+            logger.error(f"回填题单缓存失败: {e}")
+    finally:
+        await pipe.reset()
+    return result
+
+
+async def _read_user_lists(user_id: int) -> Dict[int, bool]:
+    rows = await ProblemList.filter(user_id=user_id).values_list("id", "is_favorite")
+    return {list_id: bool(favorite) for list_id, favorite in rows}
+
+
+async def get_user_lists(user_id: int) -> Dict[int, bool]:
+    """获取用户的全部题单，返回 {list_id: is_favorite}"""
+    key = _user_lists_key(user_id)
+    try:
+        batcher = await get_redis_batcher()
+        raw = await batcher.execute("HGETALL", key)
+    except Exception as e:
+        # Redis 不可用时直接读取数据库，不回填缓存
+        logger.error(f"读取用户题单缓存失败: {e}")
+        return await _read_user_lists(user_id)
+    if not raw:
+        return await _refill(
+            key,
+            lambda: _read_user_lists(user_id),
+            lambda lists: (
+                "HSET", key, USER_LISTS_SENTINEL, "1",
+                *[item for list_id, favorite in lists.items() for item in (list_id, "1" if favorite else "0")],
+            ),
+        )
+    return {int(list_id): flag == "1" for list_id, flag in raw.items() if list_id != USER_LISTS_SENTINEL}
+
+
+async def _update_cache(key: str, *command) -> None:
+    """
+    数据库提交后同步缓存。Redis 出错时只记录日志并尽量删除该键，下次读取会从数据库重新加载；
+    数据库写入已经成功，不能因为缓存失败让请求报错。
+    """
+    try:
+        batcher = await get_redis_batcher()
+        await asyncio.gather(
+            batcher.execute(*command),
+            batcher.execute("SET", key + STAMP_SUFFIX, "1", "EX", STAMP_TTL),
+        )
+    except Exception as e:
+        logger.error(f"更新题单缓存失败，删除 {key}: {e}")
+        try:
+            batcher = await get_redis_batcher()
+            await batcher.execute("DEL", key)
+        except Exception as e:
+            logger.error(f"删除题单缓存失败: {e}")
+
+
+async def forget_user_lists(user_id: int) -> None:
+    """用户新建或删除题单后清除题单目录缓存"""
+    key = _user_lists_key(user_id)
+    await _update_cache(key, "DEL", key)
+
+
+async def _read_list(list_id: int) -> List[int]:
+    return await Question.filter(problem_lists__id=list_id).values_list("id", flat=True)
+
+
+async def _load_list(list_id: int) -> Set[int]:
+    key = _list_key(list_id)
+    question_ids = await _refill(
+        key, lambda: _read_list(list_id), lambda members: ("SADD", key, LIST_SENTINEL, *members)
+    )
+    return set(question_ids)
+
+
+async def get_list_question_ids(list_id: int) -> List[int]:
+    try:
+        batcher = await get_redis_batcher()
+        members = await batcher.execute("SMEMBERS", _list_key(list_id))
+    except Exception as e:
+        logger.error(f"读取题单成员缓存失败: {e}")
+        return sorted(await _read_list(list_id))
+    if LIST_SENTINEL not in members:
+        return sorted(await _load_list(list_id))
+    return sorted(int(member) for member in members if member != LIST_SENTINEL)
+
+
+async def add_list_member(list_id: int, question_id: int) -> None:
+    # 集合未加载时 SADD 产生的集合缺少哨兵，下次读取仍会从数据库重新加载
+    key = _list_key(list_id)
+    await _update_cache(key, "SADD", key, question_id)
+
+
+async def remove_list_member(list_id: int, question_id: int) -> None:
+    key = _list_key(list_id)
+    await _update_cache(key, "SREM", key, question_id)
+
+
+async def forget_list(list_id: int) -> None:
+    key = _list_key(list_id)
+    await _update_cache(key, "DEL", key)
+
+
+async def annotate_membership(user_id: int, question_ids: Sequence[int]) -> Dict[int, Tuple[bool, List[int]]]:
+    """
+    一次批量检查整页题目在用户各题单中的归属，返回 {question_id: (是否收藏, 所在普通题单 id)}。
+    每个题单一条 SMISMEMBER，同一 tick 内发出，由批处理器合并为一次往返。
+    Redis 不可用时不标注归属（均视为未收藏、不在任何题单中），不影响题目列表本身。
+    """
+    if not question_ids:
+        return {}
+    try:
+        return await _annotate_membership(user_id, question_ids)
+    except Exception as e:
+        logger.error(f"检查题单归属失败: {e}")
+        return {question_id: (False, []) for question_id in question_ids}
+
+
+async def _annotate_membership(user_id: int, question_ids: Sequence[int]) -> Dict[int, Tuple[bool, List[int]]]:
+    annotations: Dict[int, Tuple[bool, List[int]]] = {question_id: (False, []) for question_id in question_ids}
+    lists = await get_user_lists(user_id)
+    if not lists:
+        return annotations
+
+    batcher = await get_redis_batcher()
+    list_ids = list(lists)
+    results = await asyncio.gather(*[
+        batcher.execute("SMISMEMBER", _list_key(list_id), LIST_SENTINEL, *question_ids)
+        for list_id in list_ids
+    ])
+    for list_id, flags in zip(list_ids, results):
+        if not flags[0]:
+            # 哨兵不在集合中：缓存已过期，回源后在本地计算
+            members = await _load_list(list_id)
+            flags = [True] + [question_id in members for question_id in question_ids]
+        for question_id, is_member in zip(question_ids, flags[1:]):
+            if not is_member:
+                continue
+            starred, in_lists = annotations[question_id]
+            if lists[list_id]:
+                annotations[question_id] = (True, in_lists)
+            else:
+                in_lists.append(list_id)
+    return annotations
@@ -0,0 +1,127 @@
+# app/core/profile_cache
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.api.utils import get_redis_batcher
+from app.core.config import settings
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+# Redis 中公开资料缓存的键前缀
+PROFILE_KEY_PREFIX = "user_profile:"
+# 负缓存标记：UID 不存在、已注销或已停用
+NEGATIVE_MARKER = "-"
+# 对外公开的用户字段
+PUBLIC_FIELDS = ("uid", "nick_name", "avatar")
+
+
+def _key(uid: str) -> str:
+    return f"{PROFILE_KEY_PREFIX}{uid}"
+
+
+class ProfileCache:
+    """
+    用户公开资料的两级缓存：进程内 LRU + Redis。
+    未命中的 UID 通过一次 uid IN (...) 查询补齐，不存在的 UID 写入负缓存。
+    进程内缓存 TTL 较短，其他 worker 的本地副本最多在该时间后失效。
+    """
+
+    def __init__(self, max_entries: int, local_ttl: int, redis_ttl: int, negative_ttl: int):
+        self._local: "OrderedDict[str, Tuple[float, Optional[dict]]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._local_ttl = local_ttl
+        self._redis_ttl = redis_ttl
+        self._negative_ttl = negative_ttl
+
+    def _local_get(self, uid: str) -> Tuple[bool, Optional[dict]]:
+        entry = self._local.get(uid)
+        if entry is None:
+            return False, None
+        expires_at, profile = entry
+        if expires_at < time.monotonic():
+            del self._local[uid]
+            return False, None
+        self._local.move_to_end(uid)
+        return True, profile
+
+    def _local_put(self, uid: str, profile: Optional[dict]) -> None:
+        self._local[uid] = (time.monotonic() + self._local_ttl, profile)
+        self._local.move_to_end(uid)
+        while len(self._local) > self._max_entries:
+            self._local.popitem(last=False)
+
+    async def get_many(self, uids: Iterable[str]) -> Dict[str, dict]:
+        """批量获取公开资料，返回 {uid: profile}，不存在的 UID 不出现在结果中"""
+        result: Dict[str, dict] = {}
+        missing: List[str] = []
+        for uid in dict.fromkeys(uids):
+            hit, profile = self._local_get(uid)
+            if not hit:
+                missing.append(uid)
+            elif profile is not None:
+                result[uid] = profile
+        if not missing:
+            return result
+
+        batcher = await get_redis_batcher()
+        try:
+            cached = await batcher.execute("MGET", *[_key(uid) for uid in missing])
+        except Exception as e:
+            logger.error(f"读取用户资料缓存失败: {e}")
+            cached = [None] * len(missing)
+
+        db_missing: List[str] = []
+        for uid, raw in zip(missing, cached):
+            if raw is None:
+                db_missing.append(uid)
+            elif raw == NEGATIVE_MARKER:
+                self._local_put(uid, None)
+            else:
+                profile = json.loads(raw)
+                self._local_put(uid, profile)
+                result[uid] = profile
+        if not db_missing:
+            return result
+
+        rows = await User.filter(
+            uid__in=db_missing, is_deleted=False, is_active=True
+        ).values(*PUBLIC_FIELDS)
+        found = {row["uid"]: row for row in rows}
+
+        writes = []
+        for uid in db_missing:
+            profile = found.get(uid)
+            self._local_put(uid, profile)
+            if profile is not None:
+                result[uid] = profile
+                writes.append(batcher.execute("SET", _key(uid), json.dumps(profile), "EX", self._redis_ttl))
+            else:
+                writes.append(batcher.execute("SET", _key(uid), NEGATIVE_MARKER, "EX", self._negative_ttl))
+        # 回填命令在同一 tick 内发出，由批处理器合并为 pipeline
+        for outcome in await asyncio.gather(*writes, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                logger.error(f"写入用户资料缓存失败: {outcome}")
+                break
+        return result
+
+    async def invalidate(self, uid: str) -> None:
+        """资料变更后删除两级缓存"""
+        self._local.pop(uid, None)
+        try:
+            batcher = await get_redis_batcher()
+            await batcher.execute("DEL", _key(uid))
+        except Exception as e:
+            logger.error(f"删除用户资料缓存失败: {e}")
+
+
+profile_cache = ProfileCache(
+    max_entries=settings.PROFILE_CACHE_SIZE,
+    local_ttl=settings.PROFILE_CACHE_LOCAL_TTL,
+    redis_ttl=settings.PROFILE_CACHE_TTL,
+    negative_ttl=settings.PROFILE_CACHE_NEGATIVE_TTL,
+)
@@ -0,0 +1,154 @@
+# app/core/provisioning
+import asyncio
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
+
+from app.api.deps import allocate_uid_block
+from app.core.config import settings
+from app.core.security import hash_passwords
+from app.models import User
+from app.schemas import ProvisionError, ProvisionReport, UserCreate
+
+logger = logging.getLogger(__name__)
+
+# 每个哈希任务包含的密码数
+HASH_CHUNK_SIZE = 64
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """密码哈希进程池单例；使用 spawn 避免在事件循环运行中 fork"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PROVISION_HASH_WORKERS or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def parse_records(content: str, fmt: str) -> List[Tuple[int, Any]]:
+    """解析 CSV（带表头）或 JSONL 内容，返回 (行号, 原始记录)"""
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        # 引号内的字段可以跨行，行号取读到该记录末尾时的物理行号
+        return [(reader.line_num, row) for row in reader]
+    if fmt == "jsonl":
+        records: List[Tuple[int, Any]] = []
+        for line, text in enumerate(content.splitlines(), start=1):
+            if not text.strip():
+                continue
+            try:
+                records.append((line, json.loads(text)))
+            except json.JSONDecodeError as e:
+                records.append((line, e))
+        return records
+    raise ValueError(f"不支持的格式: {fmt}")
+
+
+async def _hash_all(passwords: List[str]) -> List[str]:
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    chunks = [passwords[i:i + HASH_CHUNK_SIZE] for i in range(0, len(passwords), HASH_CHUNK_SIZE)]
+    results = await asyncio.gather(*[
+        loop.run_in_executor(executor, hash_passwords, chunk, settings.PROVISION_BCRYPT_ROUNDS)
+        for chunk in chunks
+    ])
+    return [password_hash for chunk in results for password_hash in chunk]
+
+
+async def _insert_batch(batch: List[Tuple[int, User]], errors: List[ProvisionError]) -> int:
+    try:
+        async with in_transaction():
+            await User.bulk_create([user for _, user in batch])
+        return len(batch)
+    except IntegrityError:
+        # 整批回滚后逐行插入，定位冲突的行（如导入期间被他人注册的邮箱）
+        created = 0
+        for line, user in batch:
+            try:
+                await user.save()
+                created += 1
+            except IntegrityError as e:
+                errors.append(ProvisionError(row=line, email=user.email, error=f"写入失败: {e}"))
+        return created
+
+
+async def provision_users(records: List[Tuple[int, Any]]) -> ProvisionReport:
+    """
+    批量创建账号：一次查询检查邮箱唯一性，整块分配 UID，
+    在进程池中并行计算密码哈希，按批次在事务中 bulk_create。
+    """
+    started = time.perf_counter()
+    errors: List[ProvisionError] = []
+    valid: List[Tuple[int, UserCreate]] = []
+    seen: Dict[str, int] = {}
+
+    for line, record in records:
+        if isinstance(record, Exception):
+            errors.append(ProvisionError(row=line, error=f"无法解析: {record}"))
+            continue
+        try:
+            user_data = UserCreate.model_validate(
+                {key: value for key, value in record.items() if key and value not in ("", None)}
+            )
+        except (ValidationError, AttributeError) as e:
+            email = record.get("email") if isinstance(record, dict) else None
+            errors.append(ProvisionError(row=line, email=email, error=f"数据格式错误: {e}"))
+            continue
+        if user_data.email in seen:
+            errors.append(ProvisionError(row=line, email=user_data.email, error=f"与第 {seen[user_data.email]} 行邮箱重复"))
+            continue
+        seen[user_data.email] = line
+        valid.append((line, user_data))
+
+    if valid:
+        existing = set(await User.filter(email__in=list(seen)).values_list("email", flat=True))
+        for line, user_data in valid:
+            if user_data.email in existing:
+                errors.append(ProvisionError(row=line, email=user_data.email, error="邮箱已被注册"))
+        valid = [(line, user_data) for line, user_data in valid if user_data.email not in existing]
+
+    created = 0
+    if valid:
+        uids, password_hashes = await asyncio.gather(
+            allocate_uid_block(len(valid)),
+            _hash_all([user_data.password for _, user_data in valid]),
+        )
+        users = [
+            (line, User(
+                email=user_data.email,
+                uid=uid,
+                password_hash=password_hash,
+                nick_name=user_data.nick_name,
+                phone=user_data.phone,
+            ))
+            for (line, user_data), uid, password_hash in zip(valid, uids, password_hashes)
+        ]
+        batch_size = settings.PROVISION_BATCH_SIZE
+        for i in range(0, len(users), batch_size):
+            created += await _insert_batch(users[i:i + batch_size], errors)
+
+    errors.sort(key=lambda error: error.row)
+    elapsed_ms = int((time.perf_counter() - started) * 1000)
+    logger.info(f"批量创建账号完成: 成功 {created}，失败 {len(errors)}，耗时 {elapsed_ms} ms")
+    return ProvisionReport(created=created, failed=len(errors), errors=errors, elapsed_ms=elapsed_ms)
@@ -0,0 +1,102 @@
+# app/core/pubsub
+import asyncio
+import inspect
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from app.api.utils import get_redis_batcher, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str], Union[None, Awaitable[None]]]
+ConnectHandler = Callable[[], Awaitable[None]]
+
+
+class PubSubDispatcher:
+    """
+    进程内共享的 Redis 订阅分发器。
+    每个 worker 只维持一条订阅连接，按频道把消息分发给注册的处理函数；
+    断线重连后调用 on_connect 回调重新同步可能错过的状态。
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[MessageHandler]] = {}
+        self._connect_handlers: List[ConnectHandler] = []
+        self._task: Optional[asyncio.Task] = None
+        self._healthy = False
+
+    @property
+    def healthy(self) -> bool:
+        """订阅连接是否正常，不正常时调用方应回退到直接读取 Redis"""
+        return self._healthy
+
+    def subscribe(self, channel: str, handler: MessageHandler, on_connect: Optional[ConnectHandler] = None) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+        if on_connect is not None:
+            self._connect_handlers.append(on_connect)
+
+    async def publish(self, channel: str, message: str) -> None:
+        batcher = await get_redis_batcher()
+        await batcher.execute("PUBLISH", channel, message)
+
+    async def start(self) -> None:
+        if self._task is None and self._handlers:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._healthy = False
+
+    async def _run(self) -> None:
+        retry_delay = 1
+        while True:
+            pubsub = None
+            try:
+                client = await get_redis_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(*self._handlers.keys())
+                # 任一同步回调失败都按连接失败处理：保持 unhealthy（调用方回退到直接读取 Redis），
+                # 退避后重新订阅并重新执行全部回调，避免带着不完整的本地状态继续服务
+                for on_connect in self._connect_handlers:
+                    try:
+                        await on_connect()
+                    except Exception as e:
+                        raise RuntimeError(f"订阅建立后的同步回调 {getattr(on_connect, '__qualname__', on_connect)} 执行失败: {e}") from e
+                self._healthy = True
+                retry_delay = 1
+                logger.info(f"已订阅频道: {', '.join(self._handlers.keys())}")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None and message.get("type") == "message":
+                        await self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._healthy = False
+                logger.error(f"Redis 订阅连接异常，{retry_delay} 秒后重试: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    async def _dispatch(self, channel: str, data: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                result = handler(data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"处理频道 {channel} 的消息失败: {e}")
+
+
+pubsub = PubSubDispatcher()
@@ -0,0 +1,71 @@
+# app/core/query_audit
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Iterator, List
+
+from tortoise.queryset import QuerySet
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 已检查过的 SQL 形态，同一形态的查询只 EXPLAIN 一次；按 LRU 保留，避免无限增长
+MAX_CHECKED_SHAPES = 1024
+_checked_sql: "OrderedDict[str, None]" = OrderedDict()
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r"\b\d+\b")
+_IN_LIST = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+
+
+def _shape(sql: str) -> str:
+    """把字符串、数字字面量替换为占位符，IN 列表折叠为一项：筛选取值与分页参数不同的查询共用同一形态"""
+    shape = _NUMBER.sub("?", _STRING.sub("?", sql))
+    return _IN_LIST.sub("(?)", shape)
+
+
+def _full_scan_tables(plan: Any) -> Iterator[str]:
+    """从 MySQL 的 EXPLAIN FORMAT=JSON 结果中找出 access_type 为 ALL 的表"""
+    if isinstance(plan, dict):
+        if plan.get("access_type") == "ALL":
+            yield plan.get("table_name", "?")
+        for value in plan.values():
+            yield from _full_scan_tables(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _full_scan_tables(item)
+
+
+def _parse_plan(rows: List[dict]) -> Any:
+    parsed = []
+    for row in rows:
+        for value in row.values():
+            if isinstance(value, str) and value.lstrip().startswith("{"):
+                parsed.append(json.loads(value))
+    return parsed
+
+
+async def explain_check(queryset: QuerySet, label: str) -> None:
+    """
+    开发模式下对查询执行 EXPLAIN，出现全表扫描时输出告警。
+    非调试模式直接返回，不产生额外开销。
+    """
+    if not settings.DEBUG:
+        return
+    sql = queryset.sql()
+    shape = _shape(sql)
+    if shape in _checked_sql:
+        _checked_sql.move_to_end(shape)
+        return
+    _checked_sql[shape] = None
+    if len(_checked_sql) > MAX_CHECKED_SHAPES:
+        _checked_sql.popitem(last=False)
+    try:
+        rows = await queryset.explain()
+    except Exception as e:
+        logger.warning(f"[EXPLAIN] {label} 执行计划获取失败: {e}")
+        return
+    tables = sorted(set(_full_scan_tables(_parse_plan(rows))))
+    if tables:
+        logger.warning(f"[EXPLAIN] {label} 对 {', '.join(tables)} 进行了全表扫描: {sql}")
@@ -0,0 +1,126 @@
+# app/core/redis_batch
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, List, Set, Tuple
+
+from redis.asyncio.client import Redis
+
+from app.core.tracing import current_trace
+
+logger = logging.getLogger(__name__)
+
+
+def _describe(args: tuple) -> str:
+    """慢请求记录中只保留命令名和键名，不记录写入的值"""
+    described = " ".join(str(arg) for arg in args[:2])
+    if len(args) > 2:
+        described += f" (+{len(args) - 2} args)"
+    return described
+
+
+class RedisBatcher:
+    """
+    Redis 命令自动批处理器。
+    同一事件循环 tick 内发出的相互独立的命令会被收集起来，
+    通过一次非事务 pipeline 发送，再把结果按顺序交还给各自的等待者。
+    """
+
+    def __init__(self, client: Redis, max_batch: int = 128, enabled: bool = True):
+        self._client = client
+        self._max_batch = max(1, max_batch)
+        self._enabled = enabled
+        self._pending: List[Tuple[tuple, dict, asyncio.Future]] = []
+        self._flush_scheduled = False
+        # 进行中的 flush 任务；事件循环只持有任务的弱引用，需要在这里保留强引用防止被回收
+        self._flushing: Set[asyncio.Task] = set()
+        # 统计：往返次数、命令总数以及每次往返的命令数分布
+        self.round_trips = 0
+        self.commands = 0
+        self._batch_sizes: Counter = Counter()
+
+    async def execute(self, *args: Any, **options: Any) -> Any:
+        """提交一条命令，等待其所在批次执行完成后返回结果"""
+        trace = current_trace()
+        if trace is None:
+            return await self._execute(*args, **options)
+        # 记录的是调用方视角的耗时（含等待同批次其他命令的时间）
+        started = time.perf_counter()
+        try:
+            return await self._execute(*args, **options)
+        finally:
+            trace.record("redis", (time.perf_counter() - started) * 1000, _describe(args))
+
+    async def _execute(self, *args: Any, **options: Any) -> Any:
+        if not self._enabled:
+            self._record(1)
+            return await self._client.execute_command(*args, **options)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((args, options, future))
+        if len(self._pending) >= self._max_batch:
+            self._start_flush()
+        elif not self._flush_scheduled:
+            # call_soon 的回调排在本轮已就绪的任务之后执行，
+            # 因此同一 tick 内其他协程发出的命令都会进入这一批
+            self._flush_scheduled = True
+            loop.call_soon(self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._flush(batch))
+        self._flushing.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._flushing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Redis 批量命令 flush 任务异常: {task.exception()}")
+
+    async def _flush(self, batch: List[Tuple[tuple, dict, asyncio.Future]]) -> None:
+        self._record(len(batch))
+        try:
+            if len(batch) == 1:
+                args, options, _ = batch[0]
+                results: List[Any] = [await self._client.execute_command(*args, **options)]
+            else:
+                pipe = self._client.pipeline(transaction=False)
+                for args, options, _ in batch:
+                    pipe.execute_command(*args, **options)
+                results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            logger.error(f"Redis 批量命令执行失败: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                # 调用方已取消等待
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _record(self, size: int) -> None:
+        self.round_trips += 1
+        self.commands += size
+        self._batch_sizes[size] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回批处理统计信息，用于观察往返次数的减少情况"""
+        return {
+            "enabled": self._enabled,
+            "round_trips": self.round_trips,
+            "commands": self.commands,
+            "commands_per_round_trip": round(self.commands / self.round_trips, 3) if self.round_trips else 0.0,
+            "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+        }
@@ -1,18 +1,20 @@
 # app/core/security
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import List, Optional
 from jose import jwt
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
 import logging
 from fastapi import HTTPException
 import asyncio
 
-from app.api.utils import get_redis_client
 from app.core.config import settings
+from app.core.session_epoch import bump_session_epoch
 
 logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 低于 min_rounds 的哈希（如批量导入时生成的）会在登录时自动升级
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__min_rounds=12)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -21,26 +23,34 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+def needs_password_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+def hash_passwords(passwords: List[str], rounds: int) -> List[str]:
+    """批量计算密码哈希，供进程池中的 worker 调用；rounds 为 0 时使用默认成本"""
+    hasher = bcrypt.using(rounds=rounds) if rounds else pwd_context
+    return [hasher.hash(password) for password in passwords]
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, session_epoch: int = 0) -> str:
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # epoch 低于用户当前会话纪元的 token 视为已注销
+    to_encode.update({"exp": expire, "epoch": session_epoch})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def add_token_to_blacklist(token: str, expires_delta: timedelta) -> None:
-    """Add a token to the blacklist in Redis"""
+async def revoke_user_sessions(user_id: int) -> None:
+    """Invalidate every token issued to the user by bumping their session epoch"""
     max_retries = 3
     retry_delay = 1
     
     for attempt in range(max_retries):
         try:
-            client = await get_redis_client()
-            await client.setex(f"blacklist_token:{token}", int(expires_delta.total_seconds()), "1")
-            logger.info(f"Token成功加入黑名单，剩余有效期: {expires_delta.total_seconds()}秒")
+            epoch = await bump_session_epoch(user_id)
+            logger.info(f"用户 {user_id} 的会话已全部失效，当前会话纪元: {epoch}")
             return
         except ConnectionError as e:
             logger.warning(f"Redis连接失败，尝试重试 ({attempt + 1}/{max_retries}): {e}")
@@ -54,19 +64,8 @@ async def add_token_to_blacklist(token: str, expires_delta: timedelta) -> None:
                     detail="暂时无法处理注销请求，请稍后重试"
                 )
         except Exception as e:
-            logger.error(f"将token添加到黑名单时发生错误: {e}", exc_info=True)
+            logger.error(f"递增会话纪元时发生错误: {e}", exc_info=True)
             raise HTTPException(
                 status_code=500,
                 detail="注销时发生错误，请稍后重试"
             )
-
-async def is_token_blacklisted(token: str) -> bool:
-    """Check if a token is in the blacklist"""
-    try:
-        client = await get_redis_client()
-        exists = await client.exists(f"blacklist_token:{token}") 
-        return bool(exists)
-    except Exception as e:
-        # 记录错误但不中断程序
-        logger.error(f"检查 token 黑名单时发生错误: {e}")
-        return False
@@ -0,0 +1,66 @@
+# app/core/session_epoch
+import logging
+from typing import Dict
+
+from app.api.utils import get_redis_batcher
+from app.core.pubsub import pubsub
+
+logger = logging.getLogger(__name__)
+
+# Redis 哈希：user_id -> 会话纪元，只有注销过的用户才会出现
+SESSION_EPOCH_KEY = "session_epochs"
+# 纪元变更通知频道，消息格式为 "user_id:epoch"
+SESSION_EPOCH_CHANNEL = "session_epoch"
+
+# 进程内的纪元副本，由订阅消息保持最新
+_epochs: Dict[int, int] = {}
+
+
+async def load_session_epochs() -> None:
+    """（重新）订阅时全量加载，弥补断线期间错过的消息"""
+    batcher = await get_redis_batcher()
+    raw = await batcher.execute("HGETALL", SESSION_EPOCH_KEY)
+    _epochs.clear()
+    _epochs.update({int(user_id): int(epoch) for user_id, epoch in raw.items()})
+
+
+def _apply(user_id: int, epoch: int) -> None:
+    # 纪元只增不减，乱序到达的旧消息直接忽略
+    if epoch > _epochs.get(user_id, 0):
+        _epochs[user_id] = epoch
+
+
+def _on_message(data: str) -> None:
+    user_id, epoch = data.split(":", 1)
+    _apply(int(user_id), int(epoch))
+
+
+async def get_session_epoch(user_id: int, fresh: bool = False) -> int:
+    """
+    获取用户当前的会话纪元，签发时间早于该纪元的 token 均已失效。
+    签发 token 时传入 fresh=True：本 worker 可能尚未收到其他 worker 刚发布的纪元变更，
+    用旧纪元签发的 token 会被其他 worker 拒绝，因此直接读取 Redis。
+    """
+    if pubsub.healthy and not fresh:
+        return _epochs.get(user_id, 0)
+    # 订阅不可用时回退到直接读取 Redis
+    try:
+        batcher = await get_redis_batcher()
+        epoch = int(await batcher.execute("HGET", SESSION_EPOCH_KEY, user_id) or 0)
+        _apply(user_id, epoch)
+        return epoch
+    except Exception as e:
+        logger.error(f"读取会话纪元失败: {e}")
+        return _epochs.get(user_id, 0)
+
+
+async def bump_session_epoch(user_id: int) -> int:
+    """递增用户的会话纪元并通知所有 worker"""
+    batcher = await get_redis_batcher()
+    epoch = int(await batcher.execute("HINCRBY", SESSION_EPOCH_KEY, user_id, 1))
+    _apply(user_id, epoch)
+    await pubsub.publish(SESSION_EPOCH_CHANNEL, f"{user_id}:{epoch}")
+    return epoch
+
+
+pubsub.subscribe(SESSION_EPOCH_CHANNEL, _on_message, on_connect=load_session_epochs)
@@ -0,0 +1,370 @@
+# app/core/similarity
+import asyncio
+import logging
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import uuid
+from typing import List, Optional, Tuple
+
+from app.api.utils import get_redis_batcher
+from app.core.catalog import CatalogSnapshot, catalog
+from app.core.config import settings
+from app.core.pubsub import pubsub
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # 可选依赖
+    np = None
+    sparse = None
+
+logger = logging.getLogger(__name__)
+
+# 相似题目表发布通知频道，消息格式为 "host:generation"
+SIMILARITY_PUBLISHED_CHANNEL = "similarity_published"
+SIMILARITY_LOCK_KEY = f"similarity:build_lock:{socket.gethostname()}"
+
+MAGIC = b"VJSM"
+FORMAT_VERSION = 3
+# magic, 格式版本, 所依据目录快照的构建时间, 题目数, 每道题的近邻数, 构建时的全局难度跨度
+_HEADER = struct.Struct("<4sIdIId")
+_HEADER_SIZE = (_HEADER.size + 7) // 8 * 8
+
+
+
+def _mix(values: "np.ndarray") -> "np.ndarray":
+    """splitmix64 终结函数：把整数打散为近似随机的 64 位值，求和后不同集合几乎不会碰撞"""
+    with np.errstate(over="ignore"):
+        x = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def available() -> bool:
+    return np is not None and settings.SIMILARITY_ENABLED
+
+
+class Features:
+    """由目录快照得到的向量化特征：稀疏标签矩阵（每行一道题）、来源、难度、特征指纹"""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        n = len(snapshot)
+        self.ids = np.frombuffer(snapshot.question_ids, dtype=np.int32).astype(np.int64) if n else np.zeros(0, np.int64)
+        self.source = np.frombuffer(snapshot.source_ids, dtype=np.int32) if n else np.zeros(0, np.int32)
+        difficulty = np.frombuffer(snapshot.difficulty, dtype=np.int32) if n else np.zeros(0, np.int32)
+        indptr = np.frombuffer(snapshot.question_tag_offsets, dtype=np.uint32).astype(np.int64)
+        tag_ids = np.frombuffer(snapshot.question_tags, dtype=np.int32) if len(snapshot.question_tags) else np.zeros(0, np.int32)
+        tag_table = np.frombuffer(snapshot.tag_table_ids, dtype=np.int32) if len(snapshot.tag_table_ids) else np.zeros(0, np.int32)
+        columns = np.minimum(np.searchsorted(tag_table, tag_ids), max(len(tag_table) - 1, 0))
+        self.tags = sparse.csr_matrix(
+            (np.ones(len(tag_ids), dtype=np.float32), columns, indptr),
+            shape=(n, max(len(tag_table), 1)),
+        )
+        self.tags_t = self.tags.T.tocsr()
+        self.lengths = np.diff(indptr).astype(np.float32)
+
+        # 来源与难度只有少数组合：先算出组合两两之间的分数，逐对计算时只需查表
+        pairs, group = np.unique(
+            np.stack([self.source.astype(np.int64), difficulty.astype(np.int64)], axis=1), axis=0, return_inverse=True
+        )
+        self.group = group.reshape(-1)
+        # 难度距离按全局跨度归一化，跨度变化时所有分数都随之变化
+        self.span = float(difficulty.max() - difficulty.min()) if n else 0.0
+        distance = np.abs(pairs[:, None, 1] - pairs[None, :, 1]) / (self.span or 1.0)
+        group_scores = (
+            settings.SIMILARITY_SOURCE_WEIGHT * (pairs[:, None, 0] == pairs[None, :, 0])
+            + settings.SIMILARITY_DIFFICULTY_WEIGHT * (1 - distance)
+        ).astype(np.float32)
+        # 每种组合与每道题目之间的分数（组合数 x n），分块计算时按行整行复制
+        self.base_scores = np.ascontiguousarray(group_scores[:, self.group])
+
+        # 指纹：难度、来源、标签集合都相同时不变，用于识别增量构建中发生变化的题目
+        with np.errstate(over="ignore"):
+            tag_hash = np.zeros(n, dtype=np.uint64)
+            np.add.at(tag_hash, np.repeat(np.arange(n), np.diff(indptr)), _mix(tag_ids))
+            self.fingerprint = _mix(tag_hash ^ _mix(self.source.astype(np.int64) << 32 | difficulty.astype(np.uint32)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def score(self, rows: "np.ndarray", columns: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """
+        rows 中各题与 columns（默认全部题目）中各题的相似度（稠密矩阵）：
+        标签 Jaccard、同来源、难度接近程度的加权和，题目与自身的相似度为 -inf
+        """
+        if columns is None:
+            intersection = (self.tags[rows] @ self.tags_t).tocsr()
+            other = slice(None)
+        else:
+            intersection = (self.tags[rows] @ self.tags[columns].T).tocsr()
+            other = columns
+        # Jaccard 只在有公共标签的位置非零，先在稀疏结果上计算再展开为稠密矩阵
+        row_of_entry = np.repeat(np.arange(len(rows)), np.diff(intersection.indptr))
+        union = self.lengths[rows][row_of_entry] + self.lengths[other][intersection.indices] - intersection.data
+        intersection.data *= settings.SIMILARITY_TAG_WEIGHT / union
+        scores = intersection.toarray()
+        scores += self.base_scores[self.group[rows]] if columns is None else self.base_scores[:, columns][self.group[rows]]
+        if columns is None:
+            scores[np.arange(len(rows)), rows] = -np.inf
+        else:
+            scores[rows[:, None] == columns[None, :]] = -np.inf
+        return scores
+
+
+def _top_k(scores: "np.ndarray", candidates: "np.ndarray", k: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """每行取分数最高的 k 个候选（降序），不足 k 个或分数为 -inf 的位置填 -1"""
+    rows, width = scores.shape
+    neighbours = np.full((rows, k), -1, dtype=np.int64)
+    top_scores = np.full((rows, k), -np.inf, dtype=np.float32)
+    take = min(k, width)
+    if take == 0:
+        return neighbours, top_scores
+    part = np.argpartition(scores, width - take, axis=1)[:, width - take:]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    part = np.take_along_axis(part, order, axis=1)
+    part_scores = np.take_along_axis(part_scores, order, axis=1)
+    chosen = candidates[part] if candidates.ndim == 1 else np.take_along_axis(candidates, part, axis=1)
+    valid = np.isfinite(part_scores)
+    neighbours[:, :take] = np.where(valid, chosen, -1)
+    top_scores[:, :take] = np.where(valid, part_scores, -np.inf)
+    return neighbours, top_scores
+
+
+class NeighbourTable:
+    """每道题目的 top-k 相似题目 id 与分数，按题目 id 升序排列"""
+
+    def __init__(self, catalog_built_at: float, ids, fingerprint, neighbours, scores, span: float = 0.0, buffer=None):
+        # 所依据目录快照的构建时间，与快照之间的比较方式一致，不受 generation 计数器重置影响
+        self.catalog_built_at = catalog_built_at
+        self.ids = ids
+        self.fingerprint = fingerprint
+        self.neighbours = neighbours
+        self.scores = scores
+        self.span = span
+        self._buffer = buffer
+
+    @property
+    def k(self) -> int:
+        return self.neighbours.shape[1]
+
+    def lookup(self, question_id: int) -> List[int]:
+        """二分定位题目所在行，直接返回预先计算好的近邻"""
+        row = int(np.searchsorted(self.ids, question_id))
+        if row >= len(self.ids) or self.ids[row] != question_id:
+            return []
+        return [int(neighbour) for neighbour in self.neighbours[row] if neighbour >= 0]
+
+    def to_bytes(self) -> bytes:
+        header = bytearray(_HEADER_SIZE)
+        _HEADER.pack_into(header, 0, MAGIC, FORMAT_VERSION, self.catalog_built_at, len(self.ids), self.k, self.span)
+        return b"".join((
+            bytes(header),
+            self.ids.astype("<i8").tobytes(),
+            self.fingerprint.astype("<u8").tobytes(),
+            self.neighbours.astype("<i8").tobytes(),
+            self.scores.astype("<f4").tobytes(),
+        ))
+
+    @classmethod
+    def open(cls, path: str) -> "NeighbourTable":
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, catalog_built_at, n, k, span = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("相似题目表格式不匹配")
+        if len(mapped) != _HEADER_SIZE + n * 16 + n * k * 12:
+            raise ValueError("相似题目表不完整")
+        offset = _HEADER_SIZE
+        ids = np.frombuffer(mapped, dtype="<i8", count=n, offset=offset)
+        offset += n * 8
+        fingerprint = np.frombuffer(mapped, dtype="<u8", count=n, offset=offset)
+        offset += n * 8
+        neighbours = np.frombuffer(mapped, dtype="<i8", count=n * k, offset=offset).reshape(n, k)
+        offset += n * k * 8
+        scores = np.frombuffer(mapped, dtype="<f4", count=n * k, offset=offset).reshape(n, k)
+        return cls(catalog_built_at, ids, fingerprint, neighbours, scores, span=span, buffer=mapped)
+
+
+def build_neighbours(features: Features, k: int, block_size: int, rows: Optional["np.ndarray"] = None):
+    """分块计算 rows（默认全部题目）的 top-k 近邻，每块只占用 block_size x n 的稠密内存"""
+    if rows is None:
+        rows = np.arange(len(features))
+    neighbours = np.full((len(rows), k), -1, dtype=np.int64)
+    scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        neighbours[start:start + len(block)], scores[start:start + len(block)] = _top_k(
+            features.score(block), features.ids, k
+        )
+    return neighbours, scores
+
+
+def full_rebuild(features: Features, catalog_built_at: float, k: int, block_size: int) -> NeighbourTable:
+    neighbours, scores = build_neighbours(features, k, block_size)
+    return NeighbourTable(catalog_built_at, features.ids, features.fingerprint, neighbours, scores, span=features.span)
+
+
+def update_neighbours(
+    old: Optional[NeighbourTable], features: Features, catalog_built_at: float, k: int, block_size: int
+) -> NeighbourTable:
+    """
+    增量更新：只有特征（标签、来源、难度）变化或新增的题目需要与全部题目重新计算；
+    近邻中含有变化 / 删除题目的行同样整行重算；
+    其余行的旧近邻分数仍然有效，只需与变化题目的新分数合并后重新取 top-k。
+    """
+    n = len(features)
+    if old is None or old.k != k or n == 0 or len(old.ids) == 0 or old.span != features.span:
+        # 难度跨度变化后未变化题目之间的旧分数也不再成立
+        return full_rebuild(features, catalog_built_at, k, block_size)
+
+    position = np.minimum(np.searchsorted(old.ids, features.ids), len(old.ids) - 1)
+    matched = old.ids[position] == features.ids
+    unchanged = matched & (old.fingerprint[position] == features.fingerprint)
+    changed_rows = np.flatnonzero(~unchanged)
+    removed_ids = np.setdiff1d(old.ids, features.ids, assume_unique=True)
+    if len(changed_rows) + len(removed_ids) == 0:
+        return NeighbourTable(catalog_built_at, old.ids, old.fingerprint, old.neighbours, old.scores, span=old.span)
+    if len(changed_rows) > settings.SIMILARITY_INCREMENTAL_LIMIT * n:
+        return full_rebuild(features, catalog_built_at, k, block_size)
+
+    stale_ids = np.concatenate([features.ids[changed_rows], removed_ids])
+    neighbours = np.empty((n, k), dtype=np.int64)
+    scores = np.empty((n, k), dtype=np.float32)
+    kept_rows = np.flatnonzero(unchanged)
+    neighbours[kept_rows] = old.neighbours[position[kept_rows]]
+    scores[kept_rows] = old.scores[position[kept_rows]]
+
+    affected = kept_rows[np.isin(neighbours[kept_rows], stale_ids).any(axis=1)]
+    recompute = np.union1d(changed_rows, affected)
+    neighbours[recompute], scores[recompute] = build_neighbours(features, k, block_size, recompute)
+
+    # 其余行只需计算与变化题目之间的分数（block x 变化题目数）
+    merge_rows = np.setdiff1d(kept_rows, affected, assume_unique=True)
+    if len(changed_rows) and len(merge_rows):
+        changed_ids = features.ids[changed_rows]
+        for start in range(0, len(merge_rows), block_size):
+            block = merge_rows[start:start + block_size]
+            candidate_scores = np.concatenate([scores[block], features.score(block, changed_rows)], axis=1)
+            candidates = np.concatenate(
+                [neighbours[block], np.broadcast_to(changed_ids, (len(block), len(changed_ids)))], axis=1
+            )
+            neighbours[block], scores[block] = _top_k(candidate_scores, candidates, k)
+    return NeighbourTable(catalog_built_at, features.ids, features.fingerprint, neighbours, scores, span=features.span)
+
+
+class SimilarityStore:
+    """
+    相似题目表的发布与读取，流程与目录快照相同：
+    每台主机由抢到锁的 worker 在线程中增量构建，写入临时文件后原子替换并广播，
+    其余 worker 收到通知后重新映射文件。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.table: Optional[NeighbourTable] = None
+        self._pending = False
+        self._task: Optional[asyncio.Task] = None
+        # 读取失败后不在每个请求中重试，等收到发布通知或本进程构建完成后再读取
+        self._load_failed = False
+
+    def load(self) -> bool:
+        try:
+            table = NeighbourTable.open(self.path)
+        except FileNotFoundError:
+            # 首次构建完成前文件不存在，属于正常情况
+            self._load_failed = True
+            return False
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"无法读取相似题目表 {self.path}: {e}")
+            self._load_failed = True
+            return False
+        self._load_failed = False
+        if self.table is None or table.catalog_built_at >= self.table.catalog_built_at:
+            self.table = table
+        return True
+
+    def get(self) -> Optional[NeighbourTable]:
+        if self.table is None and not self._load_failed and available():
+            self.load()
+        return self.table
+
+    def request_update(self, _snapshot: Optional[CatalogSnapshot] = None) -> None:
+        """目录快照替换后调用；构建进行中时只做标记，当前构建结束后再检查一次"""
+        self._pending = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending:
+            self._pending = False
+            try:
+                await self.build()
+            except Exception as e:
+                logger.error(f"构建相似题目表失败: {e}")
+
+    async def build(self) -> bool:
+        snapshot = catalog.snapshot
+        if snapshot is None:
+            return False
+        current = self.get()
+        if current is not None and current.catalog_built_at >= snapshot.built_at:
+            return False
+        batcher = await get_redis_batcher()
+        token = uuid.uuid4().hex
+        acquired = await batcher.execute(
+            "SET", SIMILARITY_LOCK_KEY, token, "NX", "EX", settings.SIMILARITY_LOCK_TTL
+        )
+        if not acquired:
+            return False
+        try:
+            # 锁内重新读取文件，其他 worker 可能刚刚发布过更新的版本
+            self.load()
+            previous = self.table
+            if previous is not None and previous.catalog_built_at >= snapshot.built_at:
+                return False
+            table = await asyncio.to_thread(self._compute, previous, snapshot)
+            data = table.to_bytes()
+            directory = os.path.dirname(self.path) or "."
+            fd, tmp_path = tempfile.mkstemp(prefix=".similarity-", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        finally:
+            if await batcher.execute("GET", SIMILARITY_LOCK_KEY) == token:
+                await batcher.execute("DEL", SIMILARITY_LOCK_KEY)
+        self.load()
+        logger.info(f"相似题目表已发布: generation={snapshot.generation}，{len(table.ids)} 道题目")
+        await pubsub.publish(SIMILARITY_PUBLISHED_CHANNEL, f"{socket.gethostname()}:{snapshot.generation}")
+        return True
+
+    @staticmethod
+    def _compute(previous: Optional[NeighbourTable], snapshot: CatalogSnapshot) -> NeighbourTable:
+        features = Features(snapshot)
+        return update_neighbours(
+            previous, features, snapshot.built_at, settings.SIMILAR_TOP_K, settings.SIMILARITY_BLOCK_SIZE
+        )
+
+
+similarity = SimilarityStore(settings.SIMILARITY_PATH)
+
+
+def _on_published(data: str) -> None:
+    host, _ = data.rsplit(":", 1)
+    if host == socket.gethostname():
+        similarity.load()
+
+
+if available():
+    catalog.add_listener(similarity.request_update)
+    pubsub.subscribe(SIMILARITY_PUBLISHED_CHANNEL, _on_published)
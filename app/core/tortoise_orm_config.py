@@ -12,9 +12,9 @@ TORTOISE_ORM = {
                     'password': settings.DB_PASSWORD,
                     'database': settings.DB_NAME,
                     'minsize': 1,
-                    'maxsize': 10,
+                    'maxsize': settings.db_pool_size_per_worker(),  # 连接总预算按 worker 均分
                     'charset': 'utf8mb4',
-                    'echo': True,  # 开发环境可以保留，生产环境建议关闭
+                    'echo': settings.DEBUG,  # 仅在调试模式下输出 SQL
                 }
             }
         },
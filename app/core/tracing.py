@@ -0,0 +1,184 @@
+# app/core/tracing
+import functools
+import json
+import logging
+import time
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger as loguru_logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+# 慢请求与访问日志一样经 loguru 写入 system.log，bind 的 channel 字段便于单独筛选
+slow_logger = loguru_logger.bind(channel="slow_requests")
+
+# 单条语句在慢请求记录中保留的最大长度
+MAX_STATEMENT_LENGTH = 500
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+# 是否已处于被计时的数据库调用中：MySQLClient.execute_query_dict 内部调用 execute_query，只计一次
+_in_db_call: ContextVar[bool] = ContextVar("in_db_call", default=False)
+_NULL_PHASE = nullcontext()
+
+# 慢请求环形缓冲区
+slow_requests: Deque[Dict[str, Any]] = deque(maxlen=settings.SLOW_REQUEST_BUFFER_SIZE)
+
+
+def tracing_enabled() -> bool:
+    return settings.SERVER_TIMING_ENABLED or settings.SLOW_REQUEST_SAMPLER_ENABLED
+
+
+class RequestTrace:
+    """单个请求的分阶段耗时；开启慢请求采样时同时记录每条 SQL 与 Redis 命令"""
+
+    __slots__ = ("started", "phases", "events")
+
+    def __init__(self, capture_events: bool):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}
+        self.events: Optional[List[Tuple[str, str, float]]] = [] if capture_events else None
+
+    def record(self, phase: str, elapsed_ms: float, statement: Optional[str] = None) -> None:
+        totals = self.phases.get(phase)
+        if totals is None:
+            self.phases[phase] = [elapsed_ms, 1]
+        else:
+            totals[0] += elapsed_ms
+            totals[1] += 1
+        if statement is not None and self.events is not None:
+            self.events.append((phase, statement[:MAX_STATEMENT_LENGTH], round(elapsed_ms, 3)))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        metrics = [
+            f'{phase};dur={total:.2f};desc="{int(count)}x"'
+            for phase, (total, count) in self.phases.items()
+        ]
+        metrics.append(f"total;dur={self.elapsed_ms():.2f}")
+        return ", ".join(metrics)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+class _PhaseTimer:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace: RequestTrace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.record(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+def trace_phase(name: str):
+    """为代码块计时；当前请求未开启追踪时返回空上下文，几乎没有开销"""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_PHASE
+    return _PhaseTimer(trace, name)
+
+
+def _instrument(method):
+    @functools.wraps(method)
+    async def wrapper(self, query, *args, **kwargs):
+        trace = _current_trace.get()
+        if trace is None or _in_db_call.get():
+            return await method(self, query, *args, **kwargs)
+        token = _in_db_call.set(True)
+        started = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            trace.record("db", (time.perf_counter() - started) * 1000, query)
+            _in_db_call.reset(token)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def instrument_db_client(client: Any) -> None:
+    """给 Tortoise 连接类（及其事务包装类）的执行方法加上计时，仅在开启追踪时调用"""
+    classes = [type(client)]
+    transaction_class = getattr(client, "_transaction_class", None)
+    if transaction_class is not None:
+        classes.append(transaction_class)
+    for cls in classes:
+        for name in ("execute_query", "execute_query_dict", "execute_insert", "execute_many", "execute_script"):
+            method = getattr(cls, name, None)
+            if method is not None and not getattr(method, "__traced__", False):
+                setattr(cls, name, _instrument(method))
+
+
+class TracingMiddleware:
+    """
+    为每个请求建立 RequestTrace：
+    开启 SERVER_TIMING_ENABLED 时在响应头中输出 Server-Timing，
+    开启慢请求采样时把超过阈值的请求连同全部 SQL / Redis 记录写入环形缓冲区和独立日志。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.server_timing = settings.SERVER_TIMING_ENABLED
+        self.sampler = settings.SLOW_REQUEST_SAMPLER_ENABLED
+        self.threshold_ms = settings.SLOW_REQUEST_MS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(capture_events=self.sampler)
+        token = _current_trace.set(trace)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(raw=message.setdefault("headers", []))
+                    headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            if self.sampler:
+                elapsed_ms = trace.elapsed_ms()
+                if elapsed_ms >= self.threshold_ms:
+                    self._sample(scope, status_code, elapsed_ms, trace)
+
+    @staticmethod
+    def _sample(scope: Scope, status_code: int, elapsed_ms: float, trace: RequestTrace) -> None:
+        record = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "status": status_code,
+            "duration_ms": round(elapsed_ms, 3),
+            "phases": {phase: round(total, 3) for phase, (total, _) in trace.phases.items()},
+            "events": [
+                {"kind": kind, "statement": statement, "duration_ms": duration}
+                for kind, statement, duration in trace.events or []
+            ],
+        }
+        slow_requests.append(record)
+        slow_logger.warning(json.dumps(record, ensure_ascii=False))
@@ -12,8 +12,14 @@ from tortoise import Tortoise
 
 from app.api.api import api_router
 from app.api.utils import construct_log_message, get_redis_client, close_redis_client
+from app.core.admission import AdmissionMiddleware, guard_db_client
+from app.core.catalog import catalog
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
 from app.core.log_config import setup_logger
+from app.core.provisioning import shutdown_executor
+from app.core.pubsub import pubsub
+from app.core.tracing import TracingMiddleware, instrument_db_client, tracing_enabled
 from app.core.tortoise_orm_config import TORTOISE_ORM  # 导入 TORTOISE_ORM 配置
 
 # 配置日志
@@ -29,6 +35,10 @@ async def lifespan(_app: FastAPI):
     try:
         await Tortoise.init(config=TORTOISE_ORM)  # 使用导入的配置
         await Tortoise.generate_schemas()
+        if tracing_enabled():
+            instrument_db_client(Tortoise.get_connection("default"))
+        if settings.ADMISSION_ENABLED:
+            guard_db_client(Tortoise.get_connection("default"))
         logger.info("Tortoise ORM 已成功初始化")
     except Exception as e:
         logger.error(f"Tortoise ORM 初始化失败: {e}")
@@ -42,8 +52,22 @@ async def lifespan(_app: FastAPI):
         logger.error(f"建立Redis连接失败: {exp}")
         # 不要在这里停止，继续运行
 
+    # Redis 订阅（会话纪元等跨 worker 通知），连接失败时在后台自动重试
+    await pubsub.start()
+
+    # 映射（必要时构建）目录快照，避免首个请求承担加载开销
+    try:
+        await catalog.ensure_ready()
+    except Exception as e:
+        logger.error(f"加载目录快照失败: {e}")
+    catalog.start_refresh()
+
     yield
 
+    await catalog.stop_refresh()
+    await pubsub.stop()
+    shutdown_executor()
+
     # 关闭所有连接
     try:
         await Tortoise.close_connections()
@@ -92,6 +116,10 @@ async def request_log_middleware(request: Request, call_next):
         logger.error(f"处理请求时出错: {exp}")
         raise
 
+# 准入控制中间件：位于 CORS 之内，503 响应同样带有跨域头
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)# type:ignore
+
 # CORS 中间件配置
 app.add_middleware(
     CORSMiddleware,# type:ignore
@@ -101,6 +129,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩中间件
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,# type:ignore
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        maximum_buffer=settings.COMPRESSION_MAX_BUFFER,
+    )
+
+# 请求追踪中间件（Server-Timing / 慢请求采样），关闭时不安装，没有任何开销
+if tracing_enabled():
+    app.add_middleware(TracingMiddleware)# type:ignore
+
 # 示例路由：健康检查
 @app.get("/ping")
 @limiter.limit(settings.RATE_LIMIT_GENERAL)
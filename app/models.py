@@ -28,6 +28,8 @@ class Notice(models.Model):
 
     class Meta:
         table = "notices"
+        # 公告列表按时间倒序
+        indexes = (("time",),)
 
 
 class Source(models.Model):
@@ -57,3 +59,21 @@ class Question(models.Model):
 
     class Meta:
         table = "questions"
+        # 题目列表按来源 + 难度区间筛选、按 id 分页；不限来源时只按难度区间筛选
+        indexes = (("source_id", "difficulty", "id"), ("difficulty", "id"))
+
+
+class ProblemList(models.Model):
+    id = fields.IntField(pk=True)
+    user = fields.ForeignKeyField('models.User', related_name='problem_lists')
+    name = fields.CharField(max_length=50)
+    is_favorite = fields.BooleanField(default=False, description="每个用户唯一的收藏夹")
+    # 收藏夹为所属用户 id，普通题单为 NULL；唯一索引保证并发创建时每个用户只有一个收藏夹
+    favorite_owner = fields.IntField(null=True, unique=True, description="收藏夹所属用户")
+    questions = fields.ManyToManyField('models.Question', related_name='problem_lists', through='problem_list_items')
+    created_at = fields.DatetimeField(auto_now_add=True)
+    modified_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "problem_lists"
+        indexes = (("user_id", "is_favorite"),)
@@ -0,0 +1,53 @@
+# app/provision
+"""
+批量创建账号的命令行入口：
+
+    python -m app.provision students.csv [--format csv|jsonl] [--report report.json]
+
+CSV 需包含表头 email,password,nick_name,phone；JSONL 每行一个同名字段的对象。
+"""
+import argparse
+import asyncio
+import sys
+
+from tortoise import Tortoise
+
+from app.api.utils import close_redis_client
+from app.core.provisioning import parse_records, provision_users, shutdown_executor
+from app.core.tortoise_orm_config import TORTOISE_ORM
+
+
+async def _run(path: str, fmt: str, report_path: str) -> int:
+    with open(path, encoding="utf-8-sig") as f:
+        records = parse_records(f.read(), fmt)
+
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        report = await provision_users(records)
+    finally:
+        await Tortoise.close_connections()
+        await close_redis_client()
+        shutdown_executor()
+
+    print(f"成功 {report.created}，失败 {report.failed}，耗时 {report.elapsed_ms} ms")
+    for error in report.errors:
+        print(f"  第 {error.row} 行 {error.email or ''}: {error.error}", file=sys.stderr)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(report.model_dump_json(indent=2))
+    return 0 if report.failed == 0 else 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="批量创建账号")
+    parser.add_argument("path", help="CSV 或 JSONL 文件路径")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="默认根据扩展名判断")
+    parser.add_argument("--report", default="", help="将完整结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    sys.exit(asyncio.run(_run(args.path, fmt, args.report)))
+
+
+if __name__ == "__main__":
+    main()
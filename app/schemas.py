@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -23,6 +23,33 @@ class UserPasswordUpdate(BaseModel):
     password: str
 
 
+class ProvisionError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class ProvisionReport(BaseModel):
+    created: int
+    failed: int
+    errors: List[ProvisionError]
+    elapsed_ms: int
+
+
+# 单次批量查询公开资料的 UID 上限
+MAX_PROFILE_BATCH = 500
+
+
+class UserProfilesQuery(BaseModel):
+    uids: List[str] = Field(..., min_length=1, max_length=MAX_PROFILE_BATCH)
+
+
+class UserPublicProfile(BaseModel):
+    uid: str
+    nick_name: Optional[str] = None
+    avatar: Optional[str] = None
+
+
 class Token(BaseModel):
     access_token: Optional[str]
     token_type: str = 'bearer'
@@ -81,6 +108,8 @@ class QuestionBase(BaseModel):
 
 class QuestionResponse(QuestionBase):
     id: int
+    starred: bool = False
+    list_ids: List[int] = []
 
     class Config:
         from_attributes = True
@@ -89,3 +118,25 @@ class QuestionResponse(QuestionBase):
 class QuestionsResponse(BaseModel):
     questions: List[QuestionResponse]
     total: int
+
+
+class QuestionFacetsResponse(BaseModel):
+    total: int
+    difficulty: Dict[int, int]
+    sources: Dict[int, int]
+    tags: Dict[int, int]
+
+
+class ProblemListCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=50)
+
+
+class ProblemListItem(BaseModel):
+    question_id: int
+
+
+class ProblemListResponse(BaseModel):
+    id: int
+    name: str
+    is_favorite: bool
+    count: int
@@ -0,0 +1,129 @@
+# app/server
+"""
+生产环境启动入口：
+
+    python -m app.server [--workers N] [--server gunicorn|uvicorn] [--preload]
+
+安装了 gunicorn 时使用 gunicorn 管理 UvicornWorker（支持预加载、HUP 平滑重载；
+预加载时 HUP 不会加载新代码，更新代码需完全重启），
+否则退回到 uvicorn 自带的多进程模式。两种模式下 SIGTERM 都会先停止接收新连接，
+等待进行中的请求处理完毕后再退出。
+"""
+import argparse
+import logging
+import os
+from importlib.util import find_spec
+from typing import Any, Dict
+
+from app.core.config import settings
+
+APP_URI = "app.main:app"
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_workers(requested: int = 0) -> int:
+    """确定 worker 数量，未指定时取 CPU 核数"""
+    return requested or settings.WORKERS or os.cpu_count() or 1
+
+
+def _export_workers(workers: int) -> None:
+    # 子进程重新导入配置时据此计算每个 worker 的数据库连接池大小
+    os.environ["WORKERS"] = str(workers)
+    settings.WORKERS = workers
+
+
+def _event_loop() -> str:
+    return "uvloop" if find_spec("uvloop") else "asyncio"
+
+
+def _http_protocol() -> str:
+    return "httptools" if find_spec("httptools") else "h11"
+
+
+def run_gunicorn(host: str, port: int, workers: int, preload: bool, graceful_timeout: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class _Application(BaseApplication):
+        def __init__(self, options: Dict[str, Any]):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    # UvicornWorker 默认 loop="auto"、http="auto"，已安装时自动使用 uvloop 与 httptools
+    _Application({
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": preload,
+        "graceful_timeout": graceful_timeout,
+        "timeout": graceful_timeout + 30,
+        "keepalive": settings.KEEPALIVE_TIMEOUT,
+        "max_requests": settings.MAX_REQUESTS,
+        "max_requests_jitter": settings.MAX_REQUESTS // 10,
+    }).run()
+
+
+def run_uvicorn(host: str, port: int, workers: int, graceful_timeout: int) -> None:
+    import uvicorn
+
+    # uvicorn 多进程模式不支持预加载；向主进程发送 SIGHUP 可逐个重启 worker
+    uvicorn.run(
+        APP_URI,
+        host=host,
+        port=port,
+        workers=workers,
+        loop=_event_loop(),
+        http=_http_protocol(),
+        timeout_keep_alive=settings.KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=graceful_timeout,
+        proxy_headers=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=f"{settings.PROJECT_NAME} 生产环境启动入口")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=0, help="worker 数量，默认取 CPU 核数")
+    parser.add_argument("--server", choices=["auto", "gunicorn", "uvicorn"], default="auto")
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=settings.PRELOAD_APP,
+                        help="fork 之前预加载应用（仅 gunicorn；开启后 SIGHUP 不会加载新代码）")
+    parser.add_argument("--graceful-timeout", type=int, default=settings.GRACEFUL_TIMEOUT,
+                        help="关闭或重载时等待进行中请求完成的秒数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    workers = resolve_workers(args.workers)
+    if workers > settings.DB_POOL_BUDGET:
+        # 每个 worker 至少需要一个连接，总数会超出数据库连接预算
+        if args.workers or settings.WORKERS:
+            parser.error(f"worker 数量（{workers}）超过数据库连接总预算 DB_POOL_BUDGET（{settings.DB_POOL_BUDGET}）")
+        logger.warning(f"CPU 核数（{workers}）超过 DB_POOL_BUDGET，worker 数量限制为 {settings.DB_POOL_BUDGET}")
+        workers = settings.DB_POOL_BUDGET
+    _export_workers(workers)
+
+    server = args.server
+    if server == "auto":
+        server = "gunicorn" if find_spec("gunicorn") else "uvicorn"
+
+    logger.info(
+        f"启动 {server}: {workers} 个 worker，loop={_event_loop()}，http={_http_protocol()}，"
+        f"每个 worker 数据库连接池上限 {settings.db_pool_size_per_worker()}"
+    )
+
+    if server == "gunicorn":
+        run_gunicorn(args.host, args.port, workers, args.preload, args.graceful_timeout)
+    else:
+        run_uvicorn(args.host, args.port, workers, args.graceful_timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+过载时准入控制效果的压测：
+
+    python -m benchmarks.bench_admission --overload 3
+
+用一个模拟应用代替真实接口：每个请求占用一个“数据库连接”（大小为 --pool 的信号量）
+--service-ms 毫秒。以连接池理论吞吐的 --overload 倍速率开环发送请求（90% 题目列表、10% 登录），
+分别测量不启用与启用 AdmissionMiddleware 时成功请求的延迟分位数与 503 数量。
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from app.core.admission import HIGH, LOW, NORMAL, AdmissionController, AdmissionMiddleware, DeadlineExceeded, check_deadline
+
+PREFIX = "/api/v1"
+ROUTES = ((f"{PREFIX}/questions", 0.9), (f"{PREFIX}/auth/login", 0.1))
+
+
+def _make_app(pool_size: int, service_time: float):
+    pool = asyncio.Semaphore(pool_size)
+
+    async def send_json(send, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def app(scope, receive, send):
+        try:
+            async with pool:
+                # 与 guard_db_client 相同：拿到连接后、执行查询前检查截止时间
+                check_deadline()
+                await asyncio.sleep(service_time)
+        except DeadlineExceeded:
+            await send_json(send, 503, {"detail": "deadline exceeded"})
+            return
+        await send_json(send, 200, {"ok": True})
+
+    return app
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _run(app, rate: float, duration: float, seed: int) -> Dict[str, List[Tuple[int, float]]]:
+    rng = random.Random(seed)
+    results: Dict[str, List[Tuple[int, float]]] = {path: [] for path, _ in ROUTES}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def one(path: str) -> None:
+            started = time.perf_counter()
+            response = await client.post(path)
+            results[path].append((response.status_code, (time.perf_counter() - started) * 1000))
+
+        tasks = []
+        started = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - started < duration:
+            # 开环发送：按目标速率补齐应发出的请求数，与服务端是否跟得上无关
+            due = int((time.perf_counter() - started) * rate)
+            while sent < due:
+                path = rng.choices([path for path, _ in ROUTES], weights=[weight for _, weight in ROUTES])[0]
+                tasks.append(asyncio.create_task(one(path)))
+                sent += 1
+            await asyncio.sleep(0.001)
+        await asyncio.gather(*tasks)
+    return results
+
+
+def _report(title: str, results: Dict[str, List[Tuple[int, float]]]) -> None:
+    print(title)
+    for path, samples in results.items():
+        ok = [latency for status, latency in samples if status == 200]
+        shed = sum(1 for status, _ in samples if status == 503)
+        print(
+            f"  {path:<22} 请求 {len(samples):>5}  成功 {len(ok):>5}  503 {shed:>5}  "
+            f"p50 {_percentile(ok, 0.50):>8.1f} ms  p99 {_percentile(ok, 0.99):>8.1f} ms  max {max(ok, default=float('nan')):>8.1f} ms"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="准入控制过载压测")
+    parser.add_argument("--pool", type=int, default=10, help="模拟的数据库连接池大小")
+    parser.add_argument("--service-ms", type=float, default=50, help="每个请求占用连接的时间")
+    parser.add_argument("--overload", type=float, default=3, help="发送速率相对连接池吞吐的倍数")
+    parser.add_argument("--duration", type=float, default=5, help="发送持续时间（秒）")
+    parser.add_argument("--queue-budget-ms", type=float, default=250, help="列表请求的排队预算")
+    args = parser.parse_args()
+
+    service_time = args.service_ms / 1000
+    capacity = args.pool / service_time
+    rate = capacity * args.overload
+    print(f"连接池 {args.pool}，每请求 {args.service_ms:.0f} ms，吞吐上限 {capacity:.0f} 请求/秒，发送 {rate:.0f} 请求/秒，持续 {args.duration:.0f} 秒\n")
+
+    baseline = await _run(_make_app(args.pool, service_time), rate, args.duration, seed=0)
+    _report("不启用准入控制", baseline)
+
+    controller = AdmissionController(
+        max_concurrency=args.pool * 2,
+        # 列表接口最多占用 pool - 2 个连接，为登录等高优先级请求留出余量
+        route_limits={"questions": max(1, args.pool - 2)},
+        queue_budgets={HIGH: 2.0, NORMAL: 1.0, LOW: args.queue_budget_ms / 1000},
+        request_timeout=5.0,
+        base_prefix=PREFIX,
+    )
+    admitted = await _run(AdmissionMiddleware(_make_app(args.pool, service_time), controller), rate, args.duration, seed=0)
+    _report("\n启用准入控制", admitted)
+    print(f"\n准入统计: {json.dumps(controller.stats(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+压缩 CPU 开销与节省字节数的基准测试：
+
+    python -m benchmarks.bench_compression
+
+对一页 100 道题目、完整标签列表和公告列表分别测量各编码/级别的
+单次压缩耗时与压缩率，用于选择 COMPRESSION_*_LEVEL。
+"""
+import gzip
+import json
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.core.compression import brotli, zstandard
+
+
+def _question_page() -> bytes:
+    rng = random.Random(0)
+    tags = [f"tag-{i}" for i in range(60)]
+    questions = [
+        {
+            "title": f"Problem {i}: " + " ".join(rng.choice(["sum", "tree", "graph", "path", "array", "query"]) for _ in range(4)),
+            "difficulty": rng.randint(1, 3),
+            "source": rng.choice(["Codeforces", "AtCoder", "LeetCode", "Luogu"]),
+            "tags": rng.sample(tags, rng.randint(1, 5)),
+            "id": i,
+        }
+        for i in range(100)
+    ]
+    return json.dumps({"questions": questions, "total": 12345}, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _tag_list() -> bytes:
+    return json.dumps([{"id": i, "name": f"标签{i}"} for i in range(300)], ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _notice_list() -> bytes:
+    notices = [
+        {"id": i, "title": f"公告 {i}", "content": "系统维护通知，" * 40, "time": "2025-01-01T00:00:00+08:00"}
+        for i in range(50)
+    ]
+    return json.dumps(notices, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _codecs() -> List[Tuple[str, Callable[[bytes], bytes]]]:
+    codecs: List[Tuple[str, Callable[[bytes], bytes]]] = [
+        (f"gzip-{level}", lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0))
+        for level in (1, 6, 9)
+    ]
+    if brotli is not None:
+        codecs += [(f"br-{q}", lambda data, q=q: brotli.compress(data, quality=q)) for q in (1, 5, 11)]
+    if zstandard is not None:
+        codecs += [
+            (f"zstd-{level}", lambda data, level=level: zstandard.ZstdCompressor(level=level).compress(data))
+            for level in (1, 3, 10, 19)
+        ]
+    return codecs
+
+
+def bench(payload: bytes, codec: Callable[[bytes], bytes], min_seconds: float = 0.2) -> Tuple[float, int]:
+    iterations = 0
+    start = time.perf_counter()
+    while True:
+        compressed = codec(payload)
+        iterations += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / iterations * 1000, len(compressed)
+
+
+def main() -> None:
+    payloads: Dict[str, bytes] = {
+        "questions(100)": _question_page(),
+        "tags(300)": _tag_list(),
+        "notices(50)": _notice_list(),
+    }
+    print(f"{'payload':<16}{'codec':<10}{'raw B':>9}{'out B':>9}{'saved':>8}{'ms/op':>9}{'MB/s':>9}")
+    for name, payload in payloads.items():
+        for codec_name, codec in _codecs():
+            ms, size = bench(payload, codec)
+            print(
+                f"{name:<16}{codec_name:<10}{len(payload):>9}{size:>9}"
+                f"{1 - size / len(payload):>8.1%}{ms:>9.3f}{len(payload) / 1e3 / ms:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS `notices` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `title` VARCHAR(128) NOT NULL,
+    `content` LONGTEXT NOT NULL,
+    `time` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `sources` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `name` VARCHAR(50) NOT NULL UNIQUE
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `questions` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `title` VARCHAR(128) NOT NULL,
+    `difficulty` INT NOT NULL,
+    `created_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    `modified_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `source_id` INT NOT NULL,
+    CONSTRAINT `fk_question_sources_0497a05e` FOREIGN KEY (`source_id`) REFERENCES `sources` (`id`) ON DELETE CASCADE
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `tags` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `name` VARCHAR(50) NOT NULL UNIQUE
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `users` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `uid` VARCHAR(16) NOT NULL UNIQUE,
+    `email` VARCHAR(128) NOT NULL UNIQUE,
+    `password_hash` VARCHAR(128) NOT NULL,
+    `nick_name` VARCHAR(50),
+    `phone` VARCHAR(20),
+    `gender` INT COMMENT '0:男 1:女 2:未知' DEFAULT 2,
+    `avatar` VARCHAR(128) NOT NULL DEFAULT 'default.png',
+    `created_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    `modified_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `is_admin` BOOL NOT NULL DEFAULT 0,
+    `is_active` BOOL NOT NULL DEFAULT 1,
+    `is_deleted` BOOL NOT NULL DEFAULT 0
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `aerich` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `version` VARCHAR(255) NOT NULL,
+    `app` VARCHAR(100) NOT NULL,
+    `content` JSON NOT NULL
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `question_tags` (
+    `questions_id` INT NOT NULL,
+    `tag_id` INT NOT NULL,
+    FOREIGN KEY (`questions_id`) REFERENCES `questions` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`tag_id`) REFERENCES `tags` (`id`) ON DELETE CASCADE,
+    UNIQUE KEY `uidx_question_ta_questio_60e460` (`questions_id`, `tag_id`)
+) CHARACTER SET utf8mb4;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        """
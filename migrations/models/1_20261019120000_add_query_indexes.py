@@ -0,0 +1,36 @@
+from tortoise import BaseDBAsyncClient
+
+# (表名, 索引名, 列)；索引名与 Tortoise 根据模型生成的名称保持一致
+INDEXES = (
+    ("questions", "idx_questions_source__c749a5", ("source_id", "difficulty", "id")),
+    ("questions", "idx_questions_difficu_0038f3", ("difficulty", "id")),
+    ("notices", "idx_notices_time_1ebb22", ("time",)),
+    # 自动生成的多对多中间表只有 (questions_id, tag_id) 唯一索引，按标签反查需要反向的复合索引
+    ("question_tags", "idx_question_ta_tag_id_5d8b3f", ("tag_id", "questions_id")),
+)
+
+
+async def _existing_indexes(db: BaseDBAsyncClient) -> set:
+    # 通过 init-db 新建的库已包含模型声明的索引，这里只补齐缺失的部分
+    _, rows = await db.execute_query(
+        "SELECT TABLE_NAME, INDEX_NAME FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE()"
+    )
+    return {(row["TABLE_NAME"], row["INDEX_NAME"]) for row in rows}
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    existing = await _existing_indexes(db)
+    return "\n".join(
+        f"ALTER TABLE `{table}` ADD INDEX `{name}` ({', '.join(f'`{c}`' for c in columns)});"
+        for table, name, columns in INDEXES
+        if (table, name) not in existing
+    ) or "SELECT 1;"
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    existing = await _existing_indexes(db)
+    return "\n".join(
+        f"ALTER TABLE `{table}` DROP INDEX `{name}`;"
+        for table, name, _ in INDEXES
+        if (table, name) in existing
+    ) or "SELECT 1;"
@@ -0,0 +1,28 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS `problem_lists` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `name` VARCHAR(50) NOT NULL,
+    `is_favorite` BOOL NOT NULL COMMENT '每个用户唯一的收藏夹' DEFAULT 0,
+    `created_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    `modified_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `user_id` INT NOT NULL,
+    CONSTRAINT `fk_problem__users_7dd3d930` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
+    KEY `idx_problem_lis_user_id_f93d12` (`user_id`, `is_favorite`)
+) CHARACTER SET utf8mb4;
+        CREATE TABLE IF NOT EXISTS `problem_list_items` (
+    `problem_lists_id` INT NOT NULL,
+    `question_id` INT NOT NULL,
+    FOREIGN KEY (`problem_lists_id`) REFERENCES `problem_lists` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`question_id`) REFERENCES `questions` (`id`) ON DELETE CASCADE,
+    UNIQUE KEY `uidx_problem_lis_problem_a7669e` (`problem_lists_id`, `question_id`)
+) CHARACTER SET utf8mb4;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS `problem_list_items`;
+        DROP TABLE IF EXISTS `problem_lists`;"""
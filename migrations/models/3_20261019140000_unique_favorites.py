@@ -0,0 +1,23 @@
+from tortoise import BaseDBAsyncClient
+
+# 每个用户最早创建的收藏夹
+KEEP = "SELECT `user_id`, MIN(`id`) AS `id` FROM `problem_lists` WHERE `is_favorite` = 1 GROUP BY `user_id`"
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # 并发创建可能已产生重复的收藏夹：把题目合并到最早的收藏夹后删除其余的，再回填唯一列
+    return f"""
+        ALTER TABLE `problem_lists` ADD `favorite_owner` INT UNIQUE COMMENT '收藏夹所属用户';
+        INSERT IGNORE INTO `problem_list_items` (`problem_lists_id`, `question_id`)
+    SELECT `keep`.`id`, `item`.`question_id` FROM `problem_list_items` `item`
+    JOIN `problem_lists` `dup` ON `dup`.`id` = `item`.`problem_lists_id` AND `dup`.`is_favorite` = 1
+    JOIN ({KEEP}) `keep` ON `keep`.`user_id` = `dup`.`user_id` AND `keep`.`id` <> `dup`.`id`;
+        DELETE `dup` FROM `problem_lists` `dup`
+    JOIN ({KEEP}) `keep` ON `keep`.`user_id` = `dup`.`user_id` AND `keep`.`id` <> `dup`.`id`
+    WHERE `dup`.`is_favorite` = 1;
+        UPDATE `problem_lists` SET `favorite_owner` = `user_id` WHERE `is_favorite` = 1;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `problem_lists` DROP COLUMN `favorite_owner`;"""
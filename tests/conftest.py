@@ -0,0 +1,89 @@
+"""
+接口级测试的公共夹具：通过完整的 ASGI 应用栈（含全部中间件与 lifespan）发送请求，
+数据库使用内存 SQLite，Redis 使用 fakeredis，不依赖外部服务。
+"""
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="vjudge-tests-")
+os.environ.setdefault("CATALOG_SNAPSHOT_PATH", os.path.join(_TMP, "catalog.snapshot"))
+os.environ.setdefault("SIMILARITY_PATH", os.path.join(_TMP, "similarity.table"))
+os.environ.setdefault("CATALOG_SNAPSHOT_REFRESH", "0")
+os.environ.setdefault("CATALOG_SNAPSHOT_DEBOUNCE", "0.05")
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import tortoise_orm_config
+
+tortoise_orm_config.TORTOISE_ORM["connections"]["default"] = "sqlite://:memory:"
+tortoise_orm_config.TORTOISE_ORM["apps"]["models"]["models"] = ["app.models"]
+
+import app.api.utils as utils
+from app.api.endpoints.auth import limiter as auth_limiter
+from app.core import session_epoch
+from app.core.catalog import catalog
+from app.core.facets import facet_index
+from app.core.payload_cache import payload_cache
+from app.core.similarity import similarity
+from app.main import app, limiter
+from app.models import Question, Source, Tag
+
+
+def _reset_state(tmp_path) -> None:
+    """清空进程内单例的状态，每个测试都从空库、空缓存开始"""
+    catalog.path = str(tmp_path / "catalog.snapshot")
+    catalog.snapshot = None
+    facet_index.snapshot = None
+    facet_index._row_cache.clear()
+    facet_index._titles = None
+    similarity.path = str(tmp_path / "similarity.table")
+    similarity.table = None
+    similarity._load_failed = False
+    payload_cache.invalidate()
+    session_epoch._epochs.clear()
+    limiter.reset()
+    auth_limiter.reset()
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def client(tmp_path, redis_server):
+    _reset_state(tmp_path)
+    # 预先放入 fakeredis 客户端，get_redis_client 会直接复用
+    utils._redis_client = fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True)
+    utils._redis_batcher = None
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def run(client):
+    """在应用的事件循环中执行协程（ORM 连接绑定在该循环上）"""
+    return lambda coroutine_function, *args: client.portal.call(coroutine_function, *args)
+
+
+async def seed_catalog(count: int = 30):
+    """三个来源、五个标签，第 i 题的标签由 i 的二进制位决定"""
+    sources = [await Source.create(name=f"source-{i}") for i in range(3)]
+    tags = [await Tag.create(name=f"tag-{i}") for i in range(5)]
+    questions = []
+    for i in range(count):
+        question = await Question.create(
+            title=f"Problem {i} {'dp' if i % 2 else 'graph'}", difficulty=i % 3 + 1, source=sources[i % 3]
+        )
+        await question.tags.add(*[tags[j] for j in range(5) if (i >> j) & 1])
+        questions.append(question)
+    return questions
+
+
+def register(client: TestClient, email: str = "user@example.com", password: str = "password") -> dict:
+    """注册并返回带 Bearer token 的请求头"""
+    response = client.post("/api/v1/auth/register", json={"email": email, "password": password})
+    assert response.status_code == 201, response.text
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import pytest
+
+from app.api import deps
+from app.core import admission
+from app.core.admission import DeadlineExceeded
+
+
+def test_expired_deadline_fails_registration_fast(client):
+    started = time.monotonic()
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": "late@example.com", "password": "password"},
+        headers={"X-Request-Timeout": "1"},
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"]
+    assert time.monotonic() - started < 2
+
+
+@pytest.mark.parametrize("value", ["0", "-5", "soon"])
+def test_invalid_timeout_header_falls_back_to_the_default(client, value):
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": "user@example.com", "password": "password"},
+        headers={"X-Request-Timeout": value},
+    )
+    assert response.status_code == 201, response.text
+
+
+def test_uid_generation_stops_at_the_deadline(client, run):
+    async def generate_after_deadline():
+        admission._deadline.set((time.monotonic() - 1, admission.admission))
+        # 截止时间已过时每次查库都会失败，旧实现会在重试循环中一直空转
+        return await asyncio.wait_for(deps.generate_unique_uid(), timeout=2)
+
+    with pytest.raises(DeadlineExceeded):
+        run(generate_after_deadline)
+
+
+def test_optional_user_does_not_hide_an_expired_deadline(monkeypatch):
+    async def expired(token):
+        raise DeadlineExceeded()
+
+    monkeypatch.setattr(deps, "get_current_user", expired)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(deps.get_optional_user("token"))
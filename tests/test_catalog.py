@@ -0,0 +1,79 @@
+import time
+
+import app.api.utils as utils
+from app.core import catalog as catalog_module
+from app.core.catalog import (
+    CATALOG_VERSION_KEY,
+    CatalogSnapshot,
+    CatalogStore,
+    catalog,
+    encode_snapshot,
+    notify_catalog_changed,
+)
+from app.models import Question, Source
+from tests.conftest import seed_catalog
+
+
+def _wait_for(condition) -> None:
+    """快照在后台任务中重建，轮询直到满足条件"""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and not (catalog.snapshot is not None and condition(catalog.snapshot)):
+        time.sleep(0.05)
+
+
+def _wait_for_size(expected: int) -> int:
+    _wait_for(lambda snapshot: len(snapshot) == expected)
+    return len(catalog.snapshot)
+
+
+async def _add_question(title: str) -> None:
+    source = await Source.first()
+    await Question.create(title=title, difficulty=1, source=source)
+
+
+def test_snapshot_follows_changes_after_the_version_counter_resets(client, run):
+    run(seed_catalog)
+    run(notify_catalog_changed)
+    assert _wait_for_size(30) == 30
+    for _ in range(5):
+        run(notify_catalog_changed)
+    _wait_for(lambda snapshot: snapshot.generation == 6)
+    assert catalog.snapshot.generation == 6
+
+    # Redis 数据丢失后计数器从头开始，新快照的 generation 小于当前快照
+    run(utils._redis_client.delete, CATALOG_VERSION_KEY)
+    run(_add_question, "after reset")
+    run(notify_catalog_changed)
+    assert _wait_for_size(31) == 31
+
+
+def test_direct_database_writes_are_found_by_the_fingerprint(client, run):
+    run(seed_catalog)
+    run(notify_catalog_changed)
+    _wait_for_size(30)
+    assert not run(catalog.refresh_if_changed)
+
+    run(_add_question, "written by a script")
+    assert run(catalog.refresh_if_changed)
+    assert _wait_for_size(31) == 31
+
+
+def test_newer_build_replaces_snapshot_with_higher_generation(tmp_path):
+    store = CatalogStore(str(tmp_path / "catalog.snapshot"))
+    question = [(1, "a", 1, 1, [])]
+    store._swap(CatalogSnapshot(encode_snapshot(100, question, [(1, "s")], [], built_at=10.0)))
+
+    # 上一次部署留下的文件：generation 更大但构建时间更早，不能挡住之后的构建
+    store._swap(CatalogSnapshot(encode_snapshot(3, question * 0, [(1, "s")], [], built_at=20.0)))
+    assert store.snapshot.generation == 3
+    store._swap(CatalogSnapshot(encode_snapshot(200, question, [(1, "s")], [], built_at=15.0)))
+    assert store.snapshot.generation == 3
+
+
+def test_build_failure_on_connect_does_not_fail_the_subscription(client, run, monkeypatch):
+    async def failing_build():
+        raise ConnectionError("database down")
+
+    monkeypatch.setattr(catalog, "build", failing_build)
+    run(catalog_module._on_connect)
+    run(catalog.stop_refresh)
@@ -0,0 +1,65 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+
+from app.core.compression import CompressionMiddleware, negotiate
+from tests.conftest import seed_catalog
+
+
+def test_negotiate_prefers_supported_encoding():
+    assert negotiate("gzip;q=0, deflate") is None
+    assert negotiate("identity, gzip", ["gzip"]) == "gzip"
+    assert negotiate("", ["gzip"]) is None
+
+
+def test_dynamic_json_is_compressed_through_app_stack(client, run):
+    run(seed_catalog, 100)
+    plain = client.post("/api/v1/questions?size=100", headers={"Accept-Encoding": "identity"})
+    response = client.post("/api/v1/questions?size=100", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < len(plain.content)
+    assert response.json() == plain.json()
+
+
+def _chunked_app(chunks, content_type=b"application/json"):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+def _post(app, accept_encoding="gzip"):
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.get("/", headers={"Accept-Encoding": accept_encoding})
+
+    return asyncio.run(request())
+
+
+def test_streamed_body_is_buffered_then_compressed():
+    body = json.dumps([{"id": i, "title": f"Problem {i}"} for i in range(200)]).encode()
+    chunks = [body[:1000], body[1000:], b""]
+    response = _post(CompressionMiddleware(_chunked_app(chunks), minimum_size=500, maximum_buffer=1 << 20))
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == body
+
+
+def test_stream_beyond_buffer_passes_through():
+    chunks = [b"x" * 4096 for _ in range(4)] + [b""]
+    response = _post(CompressionMiddleware(_chunked_app(chunks, b"text/plain"), minimum_size=500, maximum_buffer=8192))
+    assert "content-encoding" not in response.headers
+    assert response.content == b"".join(chunks)
+
+
+def test_event_stream_is_not_buffered():
+    chunks = [b"data: " + b"y" * 600 + b"\n\n", b""]
+    response = _post(CompressionMiddleware(_chunked_app(chunks, b"text/event-stream"), minimum_size=500))
+    assert "content-encoding" not in response.headers
+    assert response.content == b"".join(chunks)
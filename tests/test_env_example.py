@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+from dotenv import dotenv_values
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_env_example_values_have_no_inline_comments():
+    # python-dotenv 只把“空格 + #”识别为行内注释，紧跟在值后面的 # 会成为值的一部分
+    values = dotenv_values(os.path.join(ROOT, ".env.example"))
+    assert values
+    assert {key: value for key, value in values.items() if value and "#" in value} == {}
+
+
+def test_settings_load_from_env_example(tmp_path):
+    # 复制为 .env 后配置模块必须能正常导入，且各项取值与示例一致
+    (tmp_path / ".env").write_text(open(os.path.join(ROOT, ".env.example"), encoding="utf-8").read(), encoding="utf-8")
+    env = {key: value for key, value in os.environ.items() if key not in dotenv_values(os.path.join(ROOT, ".env.example"))}
+    env["PYTHONPATH"] = ROOT
+    code = (
+        "from app.core.config import settings;"
+        "assert settings.REDIS_AUTO_PIPELINE is True;"
+        "assert settings.DB_POOL_BUDGET == 10;"
+        "assert settings.admission_route_timeouts() == {'/admin/users/bulk': 0.0}"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
@@ -0,0 +1,43 @@
+import time
+
+from app.core.catalog import notify_catalog_changed
+from app.models import Question
+from tests.conftest import seed_catalog
+
+
+def _wait_for_total(client, expected: int, **params) -> dict:
+    """快照由变更通知在后台重建，轮询直到分面结果反映新数据"""
+    deadline = time.monotonic() + 5
+    while True:
+        body = client.post("/api/v1/questions/facets", params=params).json()
+        if body["total"] == expected or time.monotonic() > deadline:
+            return body
+        time.sleep(0.05)
+
+
+def test_facets_follow_catalog_changes(client, run):
+    run(seed_catalog)
+    run(notify_catalog_changed)
+
+    body = _wait_for_total(client, 30)
+    assert body["total"] == 30
+    assert body["difficulty"] == {"1": 10, "2": 10, "3": 10}
+
+
+def test_title_query_is_answered_from_the_snapshot(client, run, monkeypatch):
+    run(seed_catalog)
+    run(notify_catalog_changed)
+    _wait_for_total(client, 30)
+
+    def no_database(*args, **kwargs):
+        raise AssertionError("title search must not query the database")
+
+    monkeypatch.setattr(Question, "filter", no_database)
+
+    # 不区分大小写，与数据库 icontains 的结果一致：奇数题标题含 dp
+    body = client.post("/api/v1/questions/facets", params={"query": "DP"}).json()
+    assert body["total"] == 15
+    body = client.post("/api/v1/questions/facets", params={"query": "problem 1", "min_difficulty": 2}).json()
+    # Problem 1, 10..19 中难度 >= 2 的题
+    expected = [i for i in [1, *range(10, 20)] if i % 3 + 1 >= 2]
+    assert body["total"] == len(expected)
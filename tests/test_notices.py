@@ -0,0 +1,12 @@
+from app.models import Notice
+
+
+def test_notice_list_is_not_truncated(client, run):
+    async def seed():
+        for i in range(150):
+            await Notice.create(title=f"notice {i}", content="content")
+
+    run(seed)
+    notices = client.post("/api/v1/notices").json()
+    assert len(notices) == 150
+    assert notices[0]["title"] == "notice 149"
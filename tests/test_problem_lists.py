@@ -0,0 +1,58 @@
+import app.api.utils as utils
+from app.core import problem_lists
+from tests.conftest import register, seed_catalog
+
+
+def _create_list(client, headers) -> int:
+    response = client.post("/api/v1/lists/create", json={"name": "dp"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["data"]["id"]
+
+
+def test_removal_during_load_is_not_written_back(client, run, monkeypatch):
+    questions = run(seed_catalog, 3)
+    headers = register(client)
+    list_id = _create_list(client, headers)
+    for question in questions:
+        client.post(f"/api/v1/lists/{list_id}/add", json={"question_id": question.id}, headers=headers)
+    run(utils._redis_client.delete, problem_lists._list_key(list_id))
+
+    read_list = problem_lists._read_list
+
+    async def read_then_remove(list_id):
+        # 读库之后、回填之前，另一个请求移除了题目并同步了缓存
+        members = await read_list(list_id)
+        await questions[0].problem_lists.clear()
+        await problem_lists.remove_list_member(list_id, questions[0].id)
+        return members
+
+    monkeypatch.setattr(problem_lists, "_read_list", read_then_remove)
+    assert run(problem_lists.get_list_question_ids, list_id) == [q.id for q in questions]
+    monkeypatch.setattr(problem_lists, "_read_list", read_list)
+
+    # 旧的成员列表没有回填，下次读取从数据库重新加载
+    assert run(problem_lists.get_list_question_ids, list_id) == [q.id for q in questions[1:]]
+
+
+def test_cache_failure_after_commit_drops_the_key(client, run, monkeypatch):
+    questions = run(seed_catalog, 2)
+    headers = register(client)
+    list_id = _create_list(client, headers)
+    client.post(f"/api/v1/lists/{list_id}/add", json={"question_id": questions[0].id}, headers=headers)
+    assert run(problem_lists.get_list_question_ids, list_id) == [questions[0].id]
+
+    batcher = run(utils.get_redis_batcher)
+    execute = batcher.execute
+
+    async def failing_sadd(*command):
+        if command[0] == "SADD":
+            raise ConnectionError("redis down")
+        return await execute(*command)
+
+    monkeypatch.setattr(batcher, "execute", failing_sadd)
+    response = client.post(f"/api/v1/lists/{list_id}/add", json={"question_id": questions[1].id}, headers=headers)
+    assert response.status_code == 200
+    assert run(utils._redis_client.exists, problem_lists._list_key(list_id)) == 0
+    monkeypatch.setattr(batcher, "execute", execute)
+
+    assert run(problem_lists.get_list_question_ids, list_id) == [q.id for q in questions]
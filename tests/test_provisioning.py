@@ -0,0 +1,24 @@
+from app.core.provisioning import parse_records
+from app.core.security import hash_passwords, needs_password_rehash, verify_password
+
+
+def test_csv_rows_report_physical_line_numbers():
+    content = (
+        "email,password,nick_name\n"
+        'a@example.com,secret1,"first\nsecond"\n'
+        "b@example.com,secret2,bob\n"
+    )
+    records = parse_records(content, "csv")
+    assert [line for line, _ in records] == [3, 4]
+    assert records[0][1]["nick_name"] == "first\nsecond"
+    assert records[1][1]["email"] == "b@example.com"
+
+
+def test_bulk_hashes_use_the_default_cost_unless_lowered():
+    default_hash, = hash_passwords(["secret"], 0)
+    assert verify_password("secret", default_hash)
+    assert not needs_password_rehash(default_hash)
+
+    cheap_hash, = hash_passwords(["secret"], 4)
+    assert verify_password("secret", cheap_hash)
+    assert needs_password_rehash(cheap_hash)
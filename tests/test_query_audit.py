@@ -0,0 +1,42 @@
+import asyncio
+
+from app.core import query_audit
+from app.core.query_audit import _shape, explain_check
+
+
+class _FakeQuerySet:
+    def __init__(self, sql: str):
+        self._sql = sql
+        self.explained = 0
+
+    def sql(self) -> str:
+        return self._sql
+
+    async def explain(self):
+        self.explained += 1
+        return []
+
+
+def test_shape_ignores_literal_values():
+    first = "SELECT * FROM `questions` WHERE `title` LIKE '%dp%' AND `id` IN (1,2,3) LIMIT 20 OFFSET 0"
+    second = "SELECT * FROM `questions` WHERE `title` LIKE '%it''s graph%' AND `id` IN (7) LIMIT 50 OFFSET 100"
+    assert _shape(first) == _shape(second)
+
+
+def test_explain_once_per_shape_and_bounded(monkeypatch):
+    monkeypatch.setattr(query_audit.settings, "DEBUG", True)
+    monkeypatch.setattr(query_audit, "MAX_CHECKED_SHAPES", 8)
+    query_audit._checked_sql.clear()
+
+    async def scenario():
+        searches = [_FakeQuerySet(f"SELECT * FROM `questions` WHERE `title` LIKE '%term{i}%'") for i in range(20)]
+        for queryset in searches:
+            await explain_check(queryset, "search")
+        assert sum(queryset.explained for queryset in searches) == 1
+
+        for i in range(20):
+            await explain_check(_FakeQuerySet(f"SELECT `c{i}` FROM `questions`"), "columns")
+        assert len(query_audit._checked_sql) == 8
+
+    asyncio.run(scenario())
+    query_audit._checked_sql.clear()
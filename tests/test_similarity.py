@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+import app.api.utils as utils
+from app.core.catalog import CATALOG_VERSION_KEY, notify_catalog_changed
+from app.core.similarity import available, similarity
+from app.models import Question, Source, Tag
+from tests.conftest import seed_catalog
+
+pytestmark = pytest.mark.skipif(not available(), reason="需要安装 numpy 与 scipy")
+
+
+def _wait_for_table(size: int):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        table = similarity.get()
+        if table is not None and len(table.ids) == size:
+            return table
+        time.sleep(0.05)
+    return similarity.get()
+
+
+async def _add_question() -> int:
+    question = await Question.create(title="new", difficulty=2, source=await Source.first())
+    await question.tags.add(*await Tag.all())
+    return question.id
+
+
+def test_table_follows_the_catalog_after_the_version_counter_resets(client, run):
+    run(seed_catalog)
+    run(notify_catalog_changed)
+    assert len(_wait_for_table(30).ids) == 30
+
+    run(utils._redis_client.delete, CATALOG_VERSION_KEY)
+    question_id = run(_add_question)
+    run(notify_catalog_changed)
+    table = _wait_for_table(31)
+    assert len(table.ids) == 31
+
+    body = client.post(f"/api/v1/questions/{question_id}/similar").json()
+    assert body["total"] > 0
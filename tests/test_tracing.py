@@ -0,0 +1,34 @@
+import asyncio
+
+from loguru import logger
+
+from app.core import tracing
+from app.core.config import settings
+
+
+def test_slow_requests_reach_the_loguru_sinks(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_REQUEST_SAMPLER_ENABLED", True)
+    monkeypatch.setattr(settings, "SLOW_REQUEST_MS", 0)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    records = []
+    sink = logger.add(records.append, format="{message}")
+    try:
+        scope = {"type": "http", "method": "GET", "path": "/slow", "query_string": b"a=1", "headers": []}
+        asyncio.run(tracing.TracingMiddleware(app)(scope, receive, send))
+    finally:
+        logger.remove(sink)
+
+    slow = [record for record in records if record.record["extra"].get("channel") == "slow_requests"]
+    assert len(slow) == 1
+    assert '"path": "/slow"' in slow[0]
+    assert tracing.slow_requests[-1]["path"] == "/slow"